@@ -1,7 +1,450 @@
 import time
+import asyncio
+import weakref
+import threading
 import multiprocessing
+from array import array
+from itertools import accumulate, repeat
+from operator import and_, floordiv, or_
+from multiprocessing import shared_memory
 from shifter import Shifter
 
+def _motor_context():
+    """
+    Start method for the motor workers. A forkserver hands out workers forked
+    from a small, clean server process instead of a copy of the web server.
+    """
+    try:
+        ctx = multiprocessing.get_context('forkserver')
+    except ValueError:  # platform without forkserver
+        return multiprocessing.get_context()
+    ctx.set_forkserver_preload(['__main__', 'Stepper'])
+    return ctx
+
+class MotionProfile:
+    """
+    Speed ramp for one axis, in half-steps per second.
+
+    Moves start at start_speed (the old fixed 1200 us delay), speed up at
+    accel up to max_speed and slow back down at the end of the move. With a
+    jerk limit the acceleration itself ramps up and down too (S-curve),
+    otherwise the ramp is trapezoidal. The ramp is worked out once per
+    profile; delays() and delay_array() then only slice it for each move.
+    """
+    def __init__(self, max_speed=1600, accel=4000, jerk=None, start_speed=1e6/1200):
+        self.max_speed = max(max_speed, start_speed)
+        self.accel = accel
+        self.jerk = jerk
+        self.start_speed = start_speed
+        self._ramp = None
+        self._prefix = None
+        self._ramp_us = None
+
+    @property
+    def start_delay(self):
+        return 1e6 / self.start_speed
+
+    def ramp(self):
+        """Speed at each step of the speed-up, from start_speed to max_speed."""
+        if self._ramp is None:
+            self._ramp = self.__s_curve() if self.jerk else self.__trapezoid()
+        return self._ramp
+
+    def __trapezoid(self):
+        ramp = []
+        v = self.start_speed
+        while v < self.max_speed:
+            ramp.append(v)
+            v = (self.start_speed**2 + 2 * self.accel * len(ramp)) ** 0.5
+        return ramp
+
+    def __s_curve(self):
+        ramp = []
+        v = self.start_speed
+        a = 0.0
+        while v < self.max_speed:
+            ramp.append(v)
+            dt = 1 / v
+            if self.max_speed - v <= a * a / (2 * self.jerk):
+                a -= self.jerk * dt           # ease off so we arrive at max_speed with a = 0
+                if a <= 0:
+                    break
+            else:
+                a = min(a + self.jerk * dt, self.accel)
+            v += a * dt
+        return ramp
+
+    def delays(self, num_steps):
+        """Inter-step delays in us for a move of num_steps, ramping up and back down."""
+        ramp = self.ramp()
+        n = len(ramp)
+        delays = []
+        for i in range(num_steps):
+            k = min(i, num_steps - 1 - i)     # distance to the nearer end of the move
+            v = ramp[k] if k < n else self.max_speed
+            delays.append(1e6 / v)
+        return delays
+
+    def delay_array(self, num_steps):
+        """
+        delays() in whole us as a compact array ('H' if every delay fits in
+        16 bits, else 'I'), built by slicing a cached ramp rather than step
+        by step.
+        """
+        if self._ramp_us is None:
+            us = [round(1e6 / v) for v in self.ramp()]
+            cruise = round(1e6 / self.max_speed)
+            code = 'H' if max(us + [cruise]) < 1 << 16 else 'I'
+            self._ramp_us = (array(code, us), array(code, [cruise]))
+        ramp, cruise = self._ramp_us
+        # step i runs at ramp index min(i, n-1-i): up for ceil(n/2) steps, then the mirror image
+        up = (num_steps + 1) // 2
+        first = ramp[:up] + cruise * max(0, up - len(ramp))
+        return first + first[:num_steps // 2][::-1]
+
+    def duration(self, num_steps):
+        """Planned time in seconds for a move of num_steps (no delay list needed)."""
+        if self._prefix is None:
+            self._prefix = [0.0]
+            for v in self.ramp():
+                self._prefix.append(self._prefix[-1] + 1 / v)
+        def ramp_time(k):   # time for the first k steps of the speed-up
+            if k < len(self._prefix):
+                return self._prefix[k]
+            return self._prefix[-1] + (k - len(self._prefix) + 1) / self.max_speed
+        # step i runs at ramp speed min(i, n-1-i): a speed-up and a mirrored slow-down
+        return ramp_time((num_steps + 1) // 2) + ramp_time(num_steps // 2)
+
+def _paced(delays, cancelled):
+    """
+    Yields the delay to wait after each step of a move. Once cancelled()
+    turns true the move ramps back down, over as many steps as it took to
+    reach its current speed, and ends early.
+    """
+    n = len(delays)
+    for i, d in enumerate(delays):
+        if cancelled():
+            k = min(i, n - 1 - i)             # how far up the speed ramp we are
+            yield from reversed(delays[:k])
+            return
+        yield d
+
+def _sleep_until(due, spin_ns):
+    """Sleep until spin_ns before perf_counter_ns() reaches due, then spin the rest."""
+    wait = due - time.perf_counter_ns() - spin_ns
+    if wait > 0:
+        time.sleep(wait / 1e9)
+    while time.perf_counter_ns() < due:
+        pass
+
+class Waveform:
+    """
+    A move compiled ahead of time, so stepping it is only table lookups.
+
+    `outputs` holds the byte to latch on each tick (every motor's coil
+    pattern, 'B'), `delays` the wait after it in us ('H' or 'I', from
+    MotionProfile.delay_array), and each axis gets `counts`, its step total
+    after each tick. compile() runs the DDA (Bresenham) split across axes:
+    the axis with the most steps moves on every tick and the others in
+    proportion, so all of them arrive together. run() then streams the
+    buffers to the shift register. compile() works out each tick in closed
+    form and builds the buffers from small per-axis tables with map() and
+    array(), so there is no Python loop per tick before the first step.
+
+    Ticks are timed against absolute deadlines on perf_counter_ns rather
+    than by sleeping after the GPIO work, so neither the shiftByte time nor
+    the scheduler's overshoot adds up over a move. run() sleeps until
+    spin_ns before each deadline and spins the rest of the way, and records
+    how late each tick was in `lateness` (us).
+    """
+    spin_ns = 300_000                       # wake this early and spin up to the deadline
+
+    def __init__(self, outputs, delays, axes):
+        self.outputs = outputs
+        self.delays = delays
+        self.axes = axes                    # (motor, dir, counts) for each motor that moves
+        self.lateness = None                # us each tick fired after its deadline, from run()
+        self.elapsed_ns = 0                 # how long run() took
+
+    def __len__(self):
+        return len(self.outputs)
+
+    @classmethod
+    def compile(cls, motors, steps, profile):
+        """
+        Compile a move of motors[i] by steps[i] signed half-steps (0 keeps it
+        still, but its coils are still driven) at the pace of `profile`.
+        Each motor steps in its own drive mode, so one tick may move it one
+        or two half-steps (see Stepper.increments).
+        """
+        seq = Stepper.seq
+        # (motor, half-steps per step, direction) for each motor that moves
+        moving = [(motors[i], motors[i].increments(n), 1 if n > 0 else -1) for i, n in enumerate(steps) if n]
+        major = max((len(incs) for _, incs, _ in moving), default=0)
+        delays = profile.delay_array(major)
+        still = 0
+        for m, n in zip(motors, steps):
+            if not n:
+                still |= seq[m.step_state] << m.shifter_bit_start
+        outputs = None
+        axes = []
+        for m, incs, dir in moving:
+            n = len(incs)
+            done = list(accumulate(incs, initial=0))    # half-steps after each step
+            # coil byte after each step, from the byte for each phase offset
+            # (the motors holding still are folded into the first axis' bytes)
+            coils = [seq[(m.step_state + dir * c) % 8] << m.shifter_bit_start | still for c in range(8)]
+            still = 0
+            coils = list(map(coils.__getitem__, map(and_, done, repeat(7))))
+            if n == major:
+                # steps on every tick
+                coils, ticks = coils[1:], done[1:]
+            else:
+                # steps taken after tick t, as the Bresenham error term would
+                # give: ceil(((t + 1) * n - major // 2) / major)
+                first = n - major // 2 + major - 1
+                taken = list(map(floordiv, range(first, first + n * major, n), repeat(major)))
+                coils, ticks = map(coils.__getitem__, taken), map(done.__getitem__, taken)
+            outputs = coils if outputs is None else map(or_, outputs, coils)
+            axes.append((m, dir, array('H' if done[-1] < 1 << 16 else 'I', ticks)))
+        wide = any(m.shifter_bit_start + 4 > 8 for m in motors)
+        return cls(array('I' if wide else 'B', outputs or ()), delays, axes)
+
+    @property
+    def planned_ns(self):
+        """How long the whole move should take."""
+        return sum(self.delays) * 1000
+
+    def run(self, write, cancelled):
+        """
+        Latch each tick's byte through write() on its deadline, keeping every
+        axis' MotorState and progress counter current. Once cancelled() turns
+        true the move ramps down (see _paced) and ends early. Returns the
+        number of ticks taken.
+        """
+        outputs = self.outputs
+        sleep = time.sleep
+        clock = time.perf_counter_ns
+        spin = self.spin_ns
+        lateness = self.lateness = array('i', [0]) * len(outputs)
+        SEQ, POSITION, VELOCITY = MotorState.SEQ, MotorState.POSITION, MotorState.VELOCITY
+        # everything the loop touches, bound up front: (words, remaining, start, dir, counts, total, scale)
+        axes = [(m.motion._words, m._remaining, m.motion.position, dir, counts, counts[-1],
+                 dir * 1e6 * counts[-1] / len(outputs))
+                for m, dir, counts in self.axes]
+        t = -1
+        start_ns = due = clock()
+        for t, d in enumerate(_paced(self.delays, cancelled)):
+            late = clock() - due
+            if late > d * 1000:
+                # a whole step behind (descheduled?): carry on from now rather than rush to catch up
+                due += late
+            write(outputs[t])
+            lateness[t] = late // 1000
+            for words, remaining, start, dir, counts, total, scale in axes:
+                done = counts[t]
+                words[SEQ] += 1             # the MotorState seqlock, as in MotorState.advance
+                words[POSITION] = start + dir * done
+                words[VELOCITY] = int(scale / d)
+                words[SEQ] += 1
+                remaining.value = total - done
+            due += d * 1000
+            wait = due - clock() - spin
+            if wait > 0:
+                sleep(wait / 1e9)
+            while clock() < due:
+                pass
+        self.elapsed_ns = clock() - start_ns
+        # leave each motor's phase where its coils really are
+        for m, dir, counts in self.axes:
+            if t >= 0:
+                m.step_state = (m.step_state + dir * counts[t]) % 8
+        return t + 1
+
+    def worst_lateness(self):
+        """Latest any tick of the last run() fired, in us."""
+        return max(self.lateness, default=0) if self.lateness is not None else 0
+
+class MotorState:
+    """
+    Live state of one motor in a small shared-memory block, readable from any
+    process without locks or IPC (the web server shows it while a move runs).
+
+    The block is six int64 words: a sequence counter, then the position and
+    target in half-steps, the velocity in half-steps per second, flag bits
+    and how late (us) the worst step of the last move fired. Whoever is
+    driving the motor (its worker, or the caller during homing) is the only
+    writer. It makes the counter odd, writes, and makes it even again;
+    read() retries until it sees the same even counter before and after, so
+    it never returns half an update (a seqlock).
+
+    The process that creates the block owns it and unlinks it when the
+    object is collected or at exit. Copies sent to a worker attach to it by
+    name.
+    """
+    SEQ, POSITION, TARGET, VELOCITY, FLAGS, LATENESS = range(6)
+    SIZE = 6 * 8
+
+    MOVING = 1      # a move is being stepped
+    STOPPED = 2     # the last move was cut short by a cancel
+
+    def __init__(self, name=None):
+        owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=owner, size=MotorState.SIZE)
+        self._words = self._shm.buf.cast('q')
+        if owner:
+            self._shm.buf[:] = bytes(MotorState.SIZE)
+        # the word view has to go before the block can be closed
+        self._close = weakref.finalize(self, MotorState._detach, self._words, self._shm, owner)
+
+    def __getstate__(self):
+        return {'name': self._shm.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'])
+
+    @staticmethod
+    def _detach(words, shm, owner):
+        words.release()
+        shm.close()
+        if owner:
+            shm.unlink()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def position(self):
+        """Current position in half-steps (one word, so no retry needed)."""
+        return self._words[MotorState.POSITION]
+
+    @property
+    def lateness(self):
+        """Worst step lateness of the last move in us."""
+        return self._words[MotorState.LATENESS]
+
+    def read(self):
+        """Consistent (position, target, velocity, flags) snapshot."""
+        w = self._words
+        for _ in range(1000):
+            seq = w[MotorState.SEQ]
+            if not seq & 1:
+                snapshot = (w[MotorState.POSITION], w[MotorState.TARGET],
+                            w[MotorState.VELOCITY], w[MotorState.FLAGS])
+                if w[MotorState.SEQ] == seq:
+                    return snapshot
+            time.sleep(0)               # the writer is mid-update, give it the CPU
+        # the writer died mid-update; better a stale reading than a hung server
+        return (w[MotorState.POSITION], w[MotorState.TARGET],
+                w[MotorState.VELOCITY], w[MotorState.FLAGS])
+
+    def begin_move(self, steps):
+        """Writer: a move of `steps` signed half-steps is starting."""
+        w = self._words
+        w[MotorState.SEQ] += 1
+        w[MotorState.TARGET] = w[MotorState.POSITION] + steps
+        w[MotorState.FLAGS] = MotorState.MOVING
+        w[MotorState.SEQ] += 1
+
+    def advance(self, steps, velocity=0):
+        """Writer: `steps` signed half-steps taken (one drive step)."""
+        w = self._words
+        w[MotorState.SEQ] += 1
+        w[MotorState.POSITION] += steps
+        w[MotorState.VELOCITY] = velocity
+        w[MotorState.SEQ] += 1
+
+    def end_move(self, lateness=0):
+        """Writer: the move is over; flags it STOPPED if it fell short of its target."""
+        w = self._words
+        w[MotorState.SEQ] += 1
+        w[MotorState.VELOCITY] = 0
+        w[MotorState.LATENESS] = lateness
+        w[MotorState.FLAGS] = 0 if w[MotorState.POSITION] == w[MotorState.TARGET] else MotorState.STOPPED
+        w[MotorState.SEQ] += 1
+
+    def reset(self, position=0):
+        """Writer: the motor is now at `position` and standing still (zero())."""
+        w = self._words
+        w[MotorState.SEQ] += 1
+        w[MotorState.POSITION] = position
+        w[MotorState.TARGET] = position
+        w[MotorState.VELOCITY] = 0
+        w[MotorState.FLAGS] = 0
+        w[MotorState.SEQ] += 1
+
+    def close(self):
+        """Detach from the block (and remove it, in the process that created it)."""
+        self._close()
+
+class CancelToken:
+    """
+    Stop signal shared by the motor workers and whoever sequences moves.
+
+    cancel() bumps a shared generation counter. Every command is stamped
+    with the generation it was sent under, so a running move sees the change
+    on its next step (one memory read) and ramps down, and moves already
+    queued are dropped. Commands sent after cancel() run normally, so there
+    is nothing to reset. A sequencer does the same: note `generation`
+    when it starts and check cancelled(that) between moves.
+    """
+    def __init__(self):
+        self._generation = Stepper.ctx.RawValue('Q', 0)
+
+    @property
+    def generation(self):
+        return self._generation.value
+
+    def cancel(self):
+        self._generation.value += 1
+
+    def cancelled(self, since):
+        return self._generation.value != since
+
+class MoveHandle:
+    """
+    Returned by rotate/goAngle/zero and StepperGroup.move_to to follow one
+    queued command. It finishes when the motor worker reports the command
+    done; a coordinated move is done once every motor in it is done.
+
+    Use done(), wait(timeout), progress, or `await handle` from asyncio code.
+    """
+    def __init__(self, moves):
+        self.moves = list(moves)            # (motor, command number) pairs
+
+    def __add__(self, other):
+        return MoveHandle(self.moves + other.moves)
+
+    def done(self):
+        return all(m._completed.value >= seq for m, seq in self.moves)
+
+    def wait(self, timeout=None):
+        """Block until the move has finished. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for m, seq in self.moves:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not m._wait_for(seq, remaining):
+                return False
+        return True
+
+    @property
+    def progress(self):
+        """Steps left in the move: 0 when done, None while it is still queued."""
+        left = 0
+        for m, seq in self.moves:
+            completed = m._completed.value
+            if completed >= seq:
+                continue
+            if completed + 1 < seq:
+                return None
+            left = max(left, m._remaining.value)
+        return left
+
+    def __await__(self):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(None, self.wait).__await__()
+
 class Stepper:
     """
     Supports operation of an arbitrary number of stepper motors using
@@ -22,36 +465,264 @@ class Stepper:
     An instance attribute (shifter_bit_start) tracks the bit position
     in the shift register where the 4 control bits for each motor
     begin.
+
+    Each motor owns one long-lived worker process (started once, see start())
+    that takes move commands from a queue and runs them in order, so
+    rotate/goAngle/zero return immediately. With parallel_drive the shared
+    shifter_outputs/shift_lock must be created from Stepper.ctx. Motors put
+    in a StepperGroup use the group's worker instead.
+
+    `drive` picks half-step, full-step or wave drive (see drive_modes) and
+    can be changed between moves with set_drive(): full-step covers twice
+    the angle per step at the same step rate. Switching lands the motor on
+    the new mode's table with one half-step at the start of the next move.
+
+    track() is for live control (the manual sliders): it only overwrites the
+    motor's setpoint register, and at most one 'track' command is queued.
+    While it runs, the worker re-plans on every step toward the newest
+    setpoint within the profile's acceleration, slowing down, reversing or
+    stopping as needed, so stale targets never pile up.
+
+    The position is an integer half-step count kept in `motion` (a
+    MotorState, readable from any process); `angle` is worked out from it
+    on read. Absolute moves aim for the nearest whole step of the target
+    and relative moves carry their fractional step forward, so commanded
+    and real position never drift apart however long the turret runs.
     """
     # Class attributes:
     num_steppers = 0 # track number of Steppers instantiated
     shifter_outputs = None  # Will be multiprocessing.Value
     seq = [0b0001,0b0011,0b0010,0b0110,0b0100,0b1100,0b1000,0b1001]
-    delay = 1200
-    steps_per_degree = 4096/360
+    steps_per_rev = 4096                    # half-steps: positions are always counted in these
+    steps_per_degree = steps_per_rev/360
+    # Drive modes: (which entries of seq the mode uses, half-steps per step).
+    # Full-step drive energizes two coils (the odd entries, 0b0011...), wave
+    # drive one coil (the even entries); both move two half-steps per step.
+    drive_modes = {'half': (None, 1), 'full': (1, 2), 'wave': (0, 2)}
     
     shift_lock = None  # Lock for shift register writes only
+    ctx = _motor_context()  # create anything shared with the workers from this
 
-    def __init__(self, shifter, lock, parallel_drive=False):
+    def __init__(self, shifter, lock, parallel_drive=False, profile=None, cancel=None, drive='half',
+                 journal=None):
+        if drive not in Stepper.drive_modes:
+            raise ValueError(f"Unknown drive mode {drive!r}")
         self.s = shifter                    # shift register
         self.parallel_drive = parallel_drive
-        self.angle = multiprocessing.Value('f', 0)
-        self.step_state = 0                 # track position in sequence
+        self.drive = drive                  # 'half', 'full' or 'wave'
+        self.journal = journal              # StateJournal the worker logs positions to, if any
+        self.profile = profile if profile is not None else MotionProfile()  # per-axis speeds
+        self.cancel = cancel if cancel is not None else CancelToken()  # may be shared between motors
+        self._phase = Stepper.ctx.RawValue('i', 0)  # position in sequence, shared with the worker
+        self.motion = MotorState()          # step position (the source of truth), lock-free for readers
+        self._residual = 0.0                # fraction of a step rotate() still owes, worker side
+        self._origin = Stepper.ctx.RawValue('q', 0)  # where zero() has put position 0, in the frame we started in
         self.shifter_bit_start = 4 * Stepper.num_steppers  # starting bit position
         self.lock = lock                    # multiprocessing lock
-  
+
+        self._commands = Stepper.ctx.SimpleQueue()    # move commands for the worker
+        self._completed = Stepper.ctx.RawValue('Q', 0)  # commands finished by the worker
+        self._done = Stepper.ctx.Condition()  # notified by the worker as each command finishes
+        self._remaining = Stepper.ctx.RawValue('q', 0)  # steps left in the running move
+        self._issued = 0                    # commands sent to the worker
+        self._worker = None
+        self.group = None                   # StepperGroup driving this motor, if any
+        self.group_index = None
+        self._setpoint = Stepper.ctx.RawValue('q', 0)  # track() target, half-step in [0, steps_per_rev)
+        self._setpoint_gen = Stepper.ctx.RawValue('Q', 0)  # cancel generation it was set under
+        self._armed = Stepper.ctx.RawValue('b', 0)     # 1 while a 'track' command owns the setpoint
+        self._setpoint_lock = Stepper.ctx.Lock()       # hands the setpoint between track() and the worker
 
         Stepper.num_steppers += 1           # increment the instance count
 
+    def __getstate__(self):
+        # What the worker gets: the Process handle can't be pickled and the
+        # caller's lock may come from a different start method
+        state = self.__dict__.copy()
+        state['_worker'] = None
+        state['lock'] = None
+        return state
+
+    @property
+    def angle(self):
+        """Shaft angle in [0, 360) degrees, from the step position."""
+        return self.motion.position % Stepper.steps_per_rev / Stepper.steps_per_degree
+
+    def steps_to(self, angle):
+        """Signed half-steps along the shortest path from here to the nearest step of angle."""
+        return self._steps_to_step(round(angle * Stepper.steps_per_degree) % Stepper.steps_per_rev)
+
+    def _steps_to_step(self, target):
+        diff = (target - self.motion.position) % Stepper.steps_per_rev
+        if diff > Stepper.steps_per_rev // 2:
+            diff -= Stepper.steps_per_rev
+        return diff
+
+    @property
+    def step_state(self):
+        return self._phase.value
+
+    @step_state.setter
+    def step_state(self, value):
+        self._phase.value = value
+
+    def start(self):
+        """Start the motor worker. Called on the first move if not done up front."""
+        if self.group is not None:
+            self.group.start()
+            return
+        if self._worker is not None and self._worker.is_alive():
+            return
+        shared = (Stepper.shifter_outputs, Stepper.shift_lock) if self.parallel_drive else None
+        worker = Stepper.ctx.Process(target=self._serve, daemon=True, args=(shared,))
+        worker.start()
+        self._worker = worker
+
+    def close(self):
+        """Let the worker finish its queued moves, then stop it."""
+        if self.group is not None:
+            self.group.close()
+            return
+        if self._worker is None:
+            return
+        self._commands.put(None)
+        self._worker.join()
+        self._worker = None
+
+    def busy(self):
+        """True while the worker still has moves queued or running."""
+        return self._completed.value < self._issued
+
+    def wait(self, timeout=None):
+        """Block until every queued move has finished. Returns False on timeout."""
+        return self._wait_for(self._issued, timeout)
+
+    def _wait_for(self, seq, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        worker = self.group._worker if self.group is not None else self._worker
+        with self._done:
+            while self._completed.value < seq:
+                if worker is None or not worker.is_alive():
+                    raise RuntimeError("Motor worker is not running")
+                wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+                self._done.wait(wait)
+        return True
+
+    def _finish(self):
+        """Worker side: mark the running command done and wake up any waiters."""
+        with self._done:
+            self._remaining.value = 0
+            self._completed.value += 1
+            self._done.notify_all()
+
+    moves = ('rotate', 'goto', 'track', 'move_to')
+
+    @staticmethod
+    def _journal(motors, name, moving):
+        """
+        Worker side: log positions at a move boundary, before the command is
+        reported done, so a restart can pick up from there (see restore()).
+        """
+        journal = motors[0].journal
+        if journal is not None and (name in Stepper.moves or (name == 'zero' and not moving)):
+            journal.record_motors(motors, moving)
+
+    @property
+    def origin(self):
+        """
+        Sum of the positions zero() was called at: position + origin stays
+        comparable across zero() calls (homing caches switch positions so).
+        """
+        return self._origin.value
+
+    def restore(self, position, phase, origin=0):
+        """
+        Pick up from a journalled position after a restart: the rotor hasn't
+        moved, so set the bookkeeping back to the same phase. Only while the
+        worker is idle. Nothing is latched: restore every motor sharing the
+        register first, then latch once, so none of them is energized at a
+        phase it isn't at.
+        """
+        self.motion.reset(position)
+        self.step_state = phase
+        self._origin.value = origin
+
+    def _send(self, *command):
+        if self.group is not None:
+            return self.group._send(self, command)
+        self.start()
+        self._issued += 1
+        self._commands.put(command + (self.cancel.generation,))
+        return MoveHandle([(self, self._issued)])
+
+    def _serve(self, shared):
+        """Worker loop: run queued commands in order until told to stop."""
+        if shared is not None:
+            Stepper.shifter_outputs, Stepper.shift_lock = shared
+        while True:
+            command = self._commands.get()
+            if command is None:
+                break
+            Stepper._journal([self], command[0], True)
+            self._run(*command)
+            Stepper._journal([self], command[0], False)
+            self._finish()
+
+    def _run(self, name, arg, since):
+        """
+        Carry out one queued command (in whichever worker owns this motor).
+        Moves sent before the last cancel() are skipped.
+        """
+        if name in ('rotate', 'goto') and self.cancel.cancelled(since):
+            return
+        if name == 'track':
+            Stepper._track([self])
+        elif name == 'rotate':
+            self.__rotate(arg, since)
+        elif name == 'goto':
+            self.__go_angle(arg, since)
+        elif name == 'zero':
+            self._origin.value += self.motion.position
+            self.motion.reset()
+            self._residual = 0.0
+        elif name == 'profile':
+            self.profile = arg
+        elif name == 'drive':
+            self.drive = arg
+
+    @staticmethod
+    def shortest_turn(current, angle):
+        """Signed difference from current to angle (both in [0, 360)) in [-180, 180]."""
+        diff = angle - current
+        if diff > 180:
+            diff -= 360
+        elif diff < -180:
+            diff += 360
+        return diff
+
     def __sgn(self, x):
         if x == 0: return 0
         else: return int(abs(x)/x)
 
-    def __step(self, dir,update_angle=True):
-        self.step_state += dir    # increment/decrement the step
-        self.step_state %= 8      # ensure result stays in [0,7]
+    def advance(self, dir, velocity=0, most=2):
+        """
+        Take one drive step in the bookkeeping only (phase and position);
+        the caller latches the register, e.g. several motors in one byte.
+        `most` caps the step in half-steps, for landing on an exact position.
+        """
+        inc = min(self._stride(self.step_state), most)  # 1 half-step, or 2 in full/wave drive
+        self.step_state = (self.step_state + dir * inc) % 8   # next position in [0,7]
+        self.motion.advance(dir * inc, velocity * inc)
+
+    def __step(self, dir, velocity=0, most=2):
+        self.advance(dir, velocity, most)
         
-        if self.parallel_drive and Stepper.shifter_outputs is not None:
+        if self.group is not None:
+            # The group's worker is the only writer, so no lock is needed
+            self.group.latch()
+        elif self.parallel_drive and Stepper.shifter_outputs is not None:
             Stepper.shift_lock.acquire()
             # Clear this motor's 4 bits in the shared output
             Stepper.shifter_outputs.value &= ~(0b1111 << self.shifter_bit_start)
@@ -67,57 +738,299 @@ class Stepper:
             output = 0   #clearing 
             output |= Stepper.seq[self.step_state] << self.shifter_bit_start #bit masking 
             self.s.shiftByte(output)
-        
-        if update_angle:
-            self.angle.value += dir / Stepper.steps_per_degree
-            self.angle.value %= 360         # limit to [0,359.9+] range
     # Move relative angle from current position:
     
+    def _writer(self):
+        """How this motor latches a compiled move's bytes (mirrors the three paths in __step)."""
+        if self.group is not None or not (self.parallel_drive and Stepper.shifter_outputs is not None):
+            return self.s.shiftByte
+        mask = ~(0b1111 << self.shifter_bit_start)
+        def write(output):
+            with Stepper.shift_lock:
+                # keep the other motors' bits, replace ours
+                Stepper.shifter_outputs.value = Stepper.shifter_outputs.value & mask | output
+                self.s.shiftByte(Stepper.shifter_outputs.value)
+        return write
+
     def step (self, dir,speed):
-        self.__step(dir)
-        time.sleep(Stepper.delay/(1e6*speed))
-
-    def __rotate(self, delta):
-        self.lock.acquire()                 # wait until the lock is available
-        numSteps = int(Stepper.steps_per_degree * abs(delta))    # find the right # of steps
-        dir = self.__sgn(delta)        # find the direction (+/-1)
-        for s in range(numSteps):      # take the steps
-            self.__step(dir)
-            time.sleep(Stepper.delay/1e6)
-        self.lock.release()
+        self.__step(dir, velocity=int(dir * speed * self.profile.start_speed))
+        time.sleep(self.profile.start_delay/(1e6*speed))
+
+    def stop(self):
+        """Ramp down the running move and drop queued ones (see CancelToken)."""
+        self.cancel.cancel()
+
+    def set_profile(self, profile):
+        """Change this axis' speeds; takes effect from the next queued move."""
+        self.profile = profile
+        if self._worker is not None or (self.group is not None and self.group._worker is not None):
+            return self._send('profile', profile)
+
+    def set_drive(self, drive):
+        """Switch between 'half', 'full' and 'wave' drive; takes effect from the next queued move."""
+        if drive not in Stepper.drive_modes:
+            raise ValueError(f"Unknown drive mode {drive!r}")
+        self.drive = drive
+        if self._worker is not None or (self.group is not None and self.group._worker is not None):
+            return self._send('drive', drive)
+
+    @property
+    def drive_steps_per_degree(self):
+        """Steps per degree in the current drive mode (steps_per_degree is in half-steps)."""
+        return Stepper.steps_per_degree / Stepper.drive_modes[self.drive][1]
+
+    def _stride(self, phase):
+        """Half-steps the next step from phase takes: 1 to get onto the mode's table."""
+        parity, stride = Stepper.drive_modes[self.drive]
+        if parity is None or phase % 2 != parity:
+            return 1
+        return stride
+
+    def increments(self, steps):
+        """
+        Half-steps taken by each step of a move of `steps` signed half-steps
+        from the current phase, e.g. [1, 2, 2, ..., 2, 1] in full-step drive
+        when the motor starts between full steps and the move is odd.
+        """
+        left = abs(steps)
+        parity, stride = Stepper.drive_modes[self.drive]
+        if parity is None:
+            return [1] * left
+        # one half-step onto the mode's table, whole strides, then whatever is left
+        head = 1 if left and self.step_state % 2 != parity else 0
+        full, tail = divmod(left - head, stride)
+        return [1] * head + [stride] * full + [1] * tail
+
+    def __rotate(self, delta, since):
+        # moves are serialized by the worker queue, no lock needed here
+        exact = Stepper.steps_per_degree * delta + self._residual
+        steps = round(exact)                # find the right # of steps
+        self._residual = exact - steps      # and owe the rest to the next rotate
+        self.__move_steps(steps, since)
     # Move relative angle from current position:
     def rotate(self, delta):
-        time.sleep(0.1)
-        p = multiprocessing.Process(target=self.__rotate, daemon=True, args=(delta,))
-        p.start()
+        return self._send('rotate', delta)
     # Move to an absolute angle taking the shortest possible path:
     def goAngle(self, angle):
-        self.lock.acquire()
-        current = self.angle.value
-        angle %= 360
-        
-        diff = angle - current
-        
-        if diff > 180:
-            diff -= 360
-        elif diff < -180:
-            diff += 360  
-        self.angle.value = angle       
-        
-        self.lock.release() 
-        time.sleep(0.1)
-        p = multiprocessing.Process(target=self.__move_to_angle, daemon=True, args=(diff,))
-        p.start()
-        # COMPLETE THIS METHOD FOR LAB 8
-    def __move_to_angle(self, delta):
-        """Move motor without updating angle (angle already set by goAngle)"""
-        self.lock.acquire()
-        numSteps = int(Stepper.steps_per_degree * abs(delta))
-        dir = self.__sgn(delta)
-        for s in range(numSteps):
-            self.__step(dir, update_angle=False)
-            time.sleep(Stepper.delay/1e6)
-        self.lock.release()
-    # Set the motor zero point     
+        return self._send('goto', angle)
+    def __go_angle(self, angle, since):
+        """Runs in the worker, after every earlier queued command has finished."""
+        self.__move_steps(self.steps_to(angle), since)
+    def __move_steps(self, steps, since):
+        """Take `steps` signed half-steps; the position follows each one, even if cancelled."""
+        self._remaining.value = abs(steps)
+        self.motion.begin_move(steps)
+        if self.group is not None:
+            # the other motors hold still, but share the byte
+            motors = self.group.motors
+            wave = Waveform.compile(motors, [steps if m is self else 0 for m in motors], self.profile)
+        else:
+            wave = Waveform.compile([self], [steps], self.profile)
+        wave.run(self._writer(), lambda: self.cancel.cancelled(since))
+        self.motion.end_move(wave.worst_lateness())
+    # Set the motor zero point (queued so it lands after any pending moves)
     def zero(self):
-        self.angle.value = 0
\ No newline at end of file
+        return self._send('zero', None)
+
+    # Follow a live setpoint (latest wins), re-planning the move in progress:
+    def track(self, angle):
+        with self._setpoint_lock:
+            self._setpoint.value = round(angle * Stepper.steps_per_degree) % Stepper.steps_per_rev
+            self._setpoint_gen.value = self.cancel.generation
+            running = self._armed.value
+            self._armed.value = 1
+        if running:
+            # the 'track' command already queued or running picks the new target up
+            return MoveHandle([(self, self._issued)])
+        return self._send('track', None)
+
+    def _settle(self, target, generation):
+        """Worker side: give up the setpoint if nobody changed it; False if a new one came in."""
+        with self._setpoint_lock:
+            if self._setpoint.value != target or self._setpoint_gen.value != generation:
+                return False
+            self._armed.value = 0
+            return True
+
+    @staticmethod
+    def _track(motors):
+        """
+        Worker side of track(): step every armed motor toward its setpoint
+        until all of them have stopped on it. Each motor keeps its own speed
+        and next-step deadline. On every step it speeds up or slows down
+        (trapezoidal, from its profile) depending on whether it can still
+        stop in the distance left to the newest setpoint, and it only
+        reverses once it is back down to start_speed. A cancel() after the
+        setpoint was given brings the motor to a stop and drops it.
+        """
+        state = {}                          # motor -> [speed, dir, due_ns, setpoint]
+        clock = time.perf_counter_ns
+        while True:
+            for m in motors:
+                if m not in state and m._armed.value:
+                    state[m] = [0.0, 0, clock(), None]
+            if not state:
+                return
+            m = min(state, key=lambda m: state[m][2])
+            speed, dir, due, seen = state[m]
+            _sleep_until(due, Waveform.spin_ns)
+            p = m.profile
+            with m._setpoint_lock:
+                target, generation = m._setpoint.value, m._setpoint_gen.value
+            cancelled = m.cancel.cancelled(generation)
+            left = 0 if cancelled else m._steps_to_step(target)
+            if target != seen and not cancelled:
+                m.motion.begin_move(left)   # retargeted: report the new goal
+            want = (left > 0) - (left < 0)
+            if dir == 0 and want == 0:
+                # standing still on the setpoint (or cancelled): done unless a new one came in
+                if m._settle(target, generation):
+                    m.motion.end_move()
+                    del state[m]
+                else:
+                    state[m][3] = target
+                continue
+            if dir == 0:
+                dir, speed = want, p.start_speed
+            elif want != dir and speed <= p.start_speed:
+                state[m] = [0.0, 0, clock(), target]   # stop here, reverse next time round
+                continue
+            else:
+                braking = (speed * speed - p.start_speed ** 2) / (2 * p.accel)   # steps needed to stop
+                if want != dir or abs(left) / Stepper.drive_modes[m.drive][1] <= braking:
+                    speed = max(p.start_speed, max(0.0, speed * speed - 2 * p.accel) ** 0.5)
+                else:
+                    speed = min(p.max_speed, (speed * speed + 2 * p.accel) ** 0.5)
+            # heading for the setpoint, don't stride past it (an odd distance in full/wave drive)
+            m.__step(dir, velocity=int(dir * speed), most=abs(left) if want == dir else 2)
+            left = m._steps_to_step(target)
+            m._remaining.value = abs(left)
+            period = int(1e9 / speed)
+            due = max(due + period, clock() - period)   # far behind: don't rush to catch up
+            if (left == 0 or cancelled) and speed <= p.start_speed:
+                dir = 0                     # arrived at a speed we can stop from
+            state[m] = [speed, dir, due, target]
+
+
+class StepperGroup:
+    """
+    Drives several Steppers that share one shift register from a single worker.
+
+    Grouped motors hand their rotate/goAngle/zero commands to the group, so
+    only one process ever writes the register and no shift_lock is needed.
+    move_to() moves all motors at once as one compiled Waveform: every tick
+    latches a single combined byte, and every axis arrives at the same time.
+    """
+    def __init__(self, *motors):
+        self.motors = list(motors)
+        self.s = self.motors[0].s           # shared shift register
+        self._commands = Stepper.ctx.SimpleQueue()
+        self._worker = None
+        self._starting = threading.Lock()   # start() may run in a background thread and on a first move at once
+        for i, m in enumerate(self.motors):
+            m.close()                       # retire any worker it already had
+            m.group = self
+            m.group_index = i
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_worker'] = None
+        state['_starting'] = None
+        return state
+
+    def start(self):
+        """Start the group worker. Called on the first move if not done up front."""
+        with self._starting:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            worker = Stepper.ctx.Process(target=self._serve, daemon=True)
+            worker.start()
+            self._worker = worker
+
+    def close(self):
+        """Let the worker finish its queued moves, then stop it."""
+        if self._worker is None:
+            return
+        self._commands.put(None)
+        self._worker.join()
+        self._worker = None
+
+    def busy(self):
+        return any(m.busy() for m in self.motors)
+
+    def wait(self, timeout=None):
+        """Block until every motor's queued moves have finished. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for m in self.motors:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not m.wait(remaining):
+                return False
+        return True
+
+    def move_to(self, *angles):
+        """
+        Move every motor to its absolute angle (one per motor, in the order the
+        motors were given; None leaves that motor where it is), each along its
+        shortest path, all arriving together.
+        """
+        self.start()
+        for m in self.motors:
+            m._issued += 1
+        generations = tuple(m.cancel.generation for m in self.motors)
+        self._commands.put((None, ('move_to', angles), generations))
+        return MoveHandle((m, m._issued) for m in self.motors)
+
+    def _send(self, motor, command):
+        self.start()
+        motor._issued += 1
+        self._commands.put((motor.group_index, command, motor.cancel.generation))
+        return MoveHandle([(motor, motor._issued)])
+
+    def stop(self):
+        """Ramp down the running move and drop queued ones on every motor."""
+        for token in {id(m.cancel): m.cancel for m in self.motors}.values():
+            token.cancel()
+
+    def latch(self):
+        """Write every motor's current coil pattern to the register in one byte."""
+        output = 0
+        for m in self.motors:
+            output |= Stepper.seq[m.step_state] << m.shifter_bit_start
+        self.s.shiftByte(output)
+
+    def _serve(self):
+        """Worker loop: run queued commands in order until told to stop."""
+        while True:
+            item = self._commands.get()
+            if item is None:
+                break
+            index, (name, arg), since = item
+            Stepper._journal(self.motors, name, True)
+            if name == 'track':
+                # one loop follows every grouped motor that has a live setpoint
+                Stepper._track(self.motors)
+            elif index is None:
+                self.__move_to(arg, since)
+            else:
+                self.motors[index]._run(name, arg, since)
+            Stepper._journal(self.motors, name, False)
+            for m in (self.motors if index is None else [self.motors[index]]):
+                m._finish()
+
+    def __move_to(self, angles, since):
+        cancelled = lambda: any(m.cancel.cancelled(g) for m, g in zip(self.motors, since))
+        if cancelled():
+            return
+        steps = [0 if angle is None else m.steps_to(angle) for m, angle in zip(self.motors, angles)]
+        for m, n in zip(self.motors, steps):
+            m._remaining.value = abs(n)
+            m.motion.begin_move(n)
+        lateness = 0
+        if any(steps):
+            # The axis with the most steps sets the pace
+            lead = max(zip(steps, self.motors), key=lambda sm: abs(sm[0]))[1]
+            wave = Waveform.compile(self.motors, steps, lead.profile)
+            wave.run(self.s.shiftByte, cancelled)
+            lateness = wave.worst_lateness()
+        for m in self.motors:
+            m.motion.end_move(lateness)
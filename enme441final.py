@@ -1,112 +1,333 @@
-import requests
 import json
-from Stepper import Stepper
-import numpy as np
-import socket
+import gzip
+import zlib
+import hashlib
+import sys
+import importlib.util
+from Stepper import Stepper, StepperGroup, CancelToken, MotorState
+import asyncio
 import RPi.GPIO as GPIO
 import time
 import threading
 from shifter import Shifter
-import multiprocessing
+from journal import StateJournal
 from urllib.parse import unquote_plus
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+
+def lazy_import(name):
+    """
+    Returns module `name` without running it yet: it is imported on first
+    attribute access (importlib's LazyLoader). numpy and requests take
+    seconds to import on a Pi Zero and nothing needs them before the first
+    targeting or fetch.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+np = lazy_import('numpy')
+requests = lazy_import('requests')
+
 # Define the URL for your JSON endpoint
 # NOTE: Since this is a private IP (192.168.1.x), this script must be run 
 # on a machine that is on the same local network as the server.
-GPIO.setmode(GPIO.BCM) 
 
 tilt_switch_pin = 18
 laser_pin = 12
 pan_switch_pin = 27
 
-
-GPIO.setup(tilt_switch_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-GPIO.setup(pan_switch_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-GPIO.setup(laser_pin, GPIO.OUT)
+def init_hardware():
+    """
+    Claims the GPIO pins. Nothing touches the hardware at import time, so
+    call this first thing in __main__ (before any Shifter, laser or switch).
+    """
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(tilt_switch_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    GPIO.setup(pan_switch_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 
 
 pan = None
 tilt = None
 
+TARGET_KINDS = ('turrets', 'globes')
+
+def positions_to_arrays(output_dict:dict):
+    """
+    Packs every turret and globe of a positions dict into contiguous arrays.
+    Turrets come first, then globes, each in dict order.
+    Returns a dictionary with 'kind' and 'id' (one entry per row) and a
+    (N, 3) float array 'polar' holding r, theta, z.
+    """
+    kinds = []
+    ids = []
+    polar = []
+    for key in TARGET_KINDS:
+        for item, coords in output_dict.get(key, {}).items():
+            kinds.append(key)
+            ids.append(str(item))
+            polar.append((float(coords['r']), float(coords['theta']), float(coords['z'])))
+    return {
+        'kind': np.array(kinds, dtype=str),
+        'id': ids,
+        'polar': np.array(polar, dtype=float).reshape(-1, 3),
+    }
+def batch_polar_to_cartesian(polar):
+    """
+    Converts an (N, 3) array of (r, theta, z) rows to an (N, 3) array of (x, y, z).
+    Theta is expected in radians.
+    """
+    r = polar[:, 0]
+    theta = polar[:, 1]
+    return np.column_stack((r * np.cos(theta), r * np.sin(theta), polar[:, 2]))
+def turret_transform(origin, theta):
+    """
+    Builds the 4x4 homogeneous transform from the global frame into the frame of
+    a turret sitting at `origin` (x, y, z) and facing angle `theta` (radians).
+    """
+    rotation_matrix = np.array([[-np.cos(theta), np.sin(theta), 0],
+                                [-np.sin(theta), -np.cos(theta), 0],
+                                [0,                 0,                1]])
+    transform = np.eye(4)
+    transform[:3, :3] = rotation_matrix
+    transform[:3, 3] = -rotation_matrix @ np.asarray(origin, dtype=float)
+    return transform
+def batch_global_to_local(global_xyz, transform, z_offsets):
+    """
+    Applies a turret_transform() to an (N, 3) array of global points with a
+    single matrix multiply.
+    z_offsets (scalar or length N) is subtracted from the local z of each row.
+    """
+    local_xyz = global_xyz @ transform[:3, :3].T + transform[:3, 3]
+    local_xyz[:, 2] -= z_offsets
+    return local_xyz
+def batch_inverse_kinematics(local_xyz, turret_height:float=6.42222):
+    """
+    Computes pan (theta1) and tilt (theta2) for every row of an (N, 3) array of
+    local coordinates. Returns two arrays in radians.
+    """
+    x = local_xyz[:, 0]
+    y = local_xyz[:, 1]
+    theta1 = np.arctan2(y, x)
+    theta2 = np.arctan2(local_xyz[:, 2] - turret_height, np.hypot(x, y))
+    return theta1, theta2
+class TransformCache:
+    """
+    LRU cache of targeting results keyed on our turret's pose:
+    (turret_number, r, theta, turret_height, globe_height, aim_height).
+
+    Each entry holds the homogeneous transform for that pose plus the finished
+    batch (global/local coordinates and angles of every target). An entry is
+    only reused if the target positions it was built from are unchanged, so
+    re-running autonomous mode against the same JSON skips all the math.
+    """
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, polar):
+        entry = self.entries.get(key)
+        if entry is None or not np.array_equal(entry['polar'], polar):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, polar, transform, batch):
+        for value in batch.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False   # entries are shared, keep them intact
+        self.entries[key] = {'polar': polar, 'transform': transform, 'batch': batch}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)  # evict least recently used
+
+    def invalidate(self, turret_number=None):
+        """Drops every entry, or only those for one turret number."""
+        if turret_number is None:
+            self.entries.clear()
+            return
+        for key in [k for k in self.entries if k[0] == str(turret_number)]:
+            del self.entries[key]
+
+transform_cache = TransformCache()
+
+def build_target_batch(output_dict:dict, my_turret_number='1', turret_height:float=0.0,
+                       globe_height:float=0.0, aim_height:float=6.42222, cache=None):
+    """
+    Runs the whole polar -> global -> local -> (theta1, theta2) chain in one pass.
+    turret_height/globe_height are subtracted from local z like global_to_local,
+    aim_height is the laser height used by inverse_kinematics.
+    If a TransformCache is given, an unchanged pose and target set is served from it.
+    Returns the positions_to_arrays dict extended with 'global', 'local',
+    'theta1', 'theta2', 'transform' and an 'is_self' mask marking our own turret.
+    """
+    if my_turret_number =='':
+        my_turret_number = '1'
+        print('turret number not assigned')
+    my_turret_number = str(my_turret_number)
+
+    batch = positions_to_arrays(output_dict)
+    kind = batch['kind']
+    is_turret = kind == 'turrets'
+    is_self = is_turret & (np.array(batch['id'], dtype=str) == my_turret_number)
+    if not is_self.any():
+        raise KeyError(f"turret {my_turret_number} not found in positions")
+    me = int(np.flatnonzero(is_self)[0])
+
+    polar = batch['polar']
+    key = (my_turret_number, float(polar[me, 0]), float(polar[me, 1]),
+           float(turret_height), float(globe_height), float(aim_height))
+    if cache is not None:
+        entry = cache.get(key, polar)
+        if entry is not None:
+            return entry['batch']
+
+    global_xyz = batch_polar_to_cartesian(polar)
+    transform = turret_transform(global_xyz[me], polar[me, 1])
+    z_offsets = np.where(is_turret, turret_height, globe_height)
+    local_xyz = batch_global_to_local(global_xyz, transform, z_offsets)
+    theta1, theta2 = batch_inverse_kinematics(local_xyz, aim_height)
+
+    batch.update({
+        'global': global_xyz,
+        'local': local_xyz,
+        'theta1': theta1,
+        'theta2': theta2,
+        'transform': transform,
+        'is_self': is_self,
+    })
+    if cache is not None:
+        cache.put(key, polar, transform, batch)
+    return batch
+def batch_to_dict(kind, ids, columns:dict):
+    """
+    Rebuilds the nested {'turrets': {...}, 'globes': {...}} layout from row arrays.
+    columns maps an output field name to a length N array, e.g.
+    {'x': xyz[:, 0], 'y': xyz[:, 1], 'z': xyz[:, 2]}.
+    """
+    out = {key: {} for key in TARGET_KINDS}
+    values = {name: np.asarray(col).tolist() for name, col in columns.items()}
+    for i, (key, item) in enumerate(zip(kind.tolist(), ids)):
+        out[key][item] = {name: values[name][i] for name in values}
+    return out
+def xyz_columns(xyz):
+    """Splits an (N, 3) array into the x/y/z columns batch_to_dict expects."""
+    return {'x': xyz[:, 0], 'y': xyz[:, 1], 'z': xyz[:, 2]}
+
 def polar_to_cartesian(output_dict:dict):
     """
     Converts polar coordinates (r, theta) to Cartesian coordinates (x, y).
     Theta is expected in radians.
     Returns a dictionary with 'x' and 'y'.
     """
-    cartesian_dict={'turrets':{}, 'globes':{}}
     enumerated_keys = list(output_dict.items())
     if len(enumerated_keys) ==3:
-            r = output_dict['r']
-            theta = output_dict['theta']
+            r = float(output_dict['r'])
+            theta = float(output_dict['theta'])
             x = r * np.cos(theta)
             y = r * np.sin(theta)
             z = output_dict['z']
             cartesian_coords = {'x': x, 'y': y, 'z': z}
             return cartesian_coords
     else:
-        for key in output_dict:
-            for item in output_dict[key]:
-                r = output_dict[key][item]['r']
-                theta = output_dict[key][item]['theta']
-                x = r * np.cos(theta)
-                y = r * np.sin(theta)
-                z = output_dict[key][item]['z']
-                cartesian_coords = {'x': x, 'y': y, 'z': z}
-                cartesian_dict[key][item] = cartesian_coords
-        return cartesian_dict
+        batch = positions_to_arrays(output_dict)
+        return batch_to_dict(batch['kind'], batch['id'], xyz_columns(batch_polar_to_cartesian(batch['polar'])))
 def global_to_local(output_dict:dict, turret_height:float=0.0, globe_height:float=0.0,my_turret_number='1'):
     """
     Converts global Cartesian coordinates to local coordinates for each turret.
     Returns a dictionary with local 'x', 'y', 'z' for each turret and globe.
     """
-    if my_turret_number =='':
-        my_turret_number = '1'
-        print('turret number not assigned')
-
-    theta = output_dict['turrets'][my_turret_number]['theta']
-    my_global_loc = polar_to_cartesian(output_dict['turrets'][my_turret_number])
-    rotation_matrix = np.array([[-np.cos(theta), np.sin(theta), 0],
-                                [-np.sin(theta), -np.cos(theta), 0],
-                                [0,                 0,                1]])
-    local_dict={'turrets':{}, 'globes':{}}
-    polar_to_cartesian_dict = polar_to_cartesian(output_dict)
-    for key in polar_to_cartesian_dict:
-        for item in polar_to_cartesian_dict[key]:
-            global_coords = polar_to_cartesian_dict[key][item]
-            relative_global_vector = np.array([float(global_coords['x']), float(global_coords['y']), float (global_coords['z'])]) - np.array([float(my_global_loc['x']), float(my_global_loc['y']), float (my_global_loc['z'])])
-            local_vector = np.matmul(rotation_matrix, relative_global_vector)
-            
-            if key == 'turrets':
-                local_vector[2] -= turret_height
-            else:
-                local_vector[2] -= globe_height
-            local_coords = {'x': local_vector[0], 'y': local_vector[1], 'z': local_vector[2]}
-            local_dict[key][item] = local_coords
-    #not_target_dict = local_dict['turrets'].pop(str(my_turret_number))
-    return local_dict
+    batch = build_target_batch(output_dict, my_turret_number, turret_height, globe_height)
+    return batch_to_dict(batch['kind'], batch['id'], xyz_columns(batch['local']))
 def inverse_kinematics(target_dict:dict,turret_height:float=6.42222):
     """
     Computes the inverse kinematics for a 3DOF arm given x, y, z coordinates.
     Returns a dictionary with 'r' and 'theta' if successful, else None.
     """
-    target_angles = {'turrets':{}, 'globes':{}}
-    for key in target_dict:
-        for item in target_dict[key]:
-            z = float(target_dict[key][item]['z']) 
-            theta1 = np.arctan2(target_dict[key][item]['y'], target_dict[key][item]['x'])
-            r = np.sqrt(float(target_dict[key][item]['x'])**2 + float(target_dict[key][item]['y'])**2)
-            s = (z - turret_height)           
-            theta2 = np.arctan2(s, r)
-            target_angles[key][item] = {'theta1': theta1, 'theta2': theta2}
-    return target_angles
-def fire(laser_pin):
-    """
-    Turns the laser on.
-    """
-    GPIO.output(laser_pin, GPIO.HIGH)
-    time.sleep(3)
-    GPIO.output(laser_pin, GPIO.LOW)
-    time.sleep(1)
+    kinds = []
+    ids = []
+    local = []
+    for key in TARGET_KINDS:
+        for item, coords in target_dict.get(key, {}).items():
+            kinds.append(key)
+            ids.append(item)
+            local.append((float(coords['x']), float(coords['y']), float(coords['z'])))
+    theta1, theta2 = batch_inverse_kinematics(np.array(local, dtype=float).reshape(-1, 3), turret_height)
+    return batch_to_dict(np.array(kinds, dtype=str), ids, {'theta1': theta1, 'theta2': theta2})
+class LaserController:
+    """
+    Owns the laser pin. fire() switches the laser on and returns straight
+    away; one timer thread switches it off when the shot is over and then
+    holds off new shots for the cooldown.
+
+    A fire() while the laser is already on is either merged into the current
+    shot (overlap='coalesce', the shot lasts until the later end time) or
+    refused (overlap='reject'). Shots during the cooldown are refused.
+    """
+    def __init__(self, pin, cooldown=1.0, overlap='coalesce'):
+        self.pin = pin
+        self.cooldown = cooldown
+        self.overlap = overlap
+        self._cond = threading.Condition()
+        self._off_at = None                 # monotonic time the current shot ends
+        self._ready_at = 0.0                # no new shot before this
+        GPIO.setup(pin, GPIO.OUT)
+        GPIO.output(pin, GPIO.LOW)
+        self._timer = threading.Thread(target=self._run, daemon=True)
+        self._timer.start()
+
+    @property
+    def is_on(self):
+        return self._off_at is not None
+
+    def fire(self, duration=3.0):
+        """Turns the laser on for duration seconds. Returns False if the shot was refused."""
+        now = time.monotonic()
+        with self._cond:
+            if self._off_at is not None:
+                if self.overlap == 'reject':
+                    return False
+                self._off_at = max(self._off_at, now + duration)
+            elif now < self._ready_at:
+                return False
+            else:
+                GPIO.output(self.pin, GPIO.HIGH)
+                self._off_at = now + duration
+            self._cond.notify()
+        return True
+
+    def off(self):
+        """Ends the current shot early (the cooldown still applies)."""
+        with self._cond:
+            if self._off_at is not None:
+                self._off_at = time.monotonic()
+                self._cond.notify()
+
+    def _run(self):
+        with self._cond:
+            while True:
+                if self._off_at is None:
+                    self._cond.wait()
+                    continue
+                left = self._off_at - time.monotonic()
+                if left > 0:
+                    self._cond.wait(left)
+                    continue
+                GPIO.output(self.pin, GPIO.LOW)
+                self._off_at = None
+                self._ready_at = time.monotonic() + self.cooldown
+
 def fetch_and_parse_positions(url: str, my_turret_number):
     """
     Fetches JSON data from a URL and parses it into the desired dictionary structure:
@@ -157,61 +378,255 @@ def fetch_and_parse_positions(url: str, my_turret_number):
             'theta': coords.get('theta'),
             'z': coords.get('z') 
         }
-    world_cart = polar_to_cartesian(output_dict)
-    target = global_to_local(output_dict,my_turret_number = my_turret_number)     
-    return world_cart, target
+    # 5. Run the whole targeting chain once; the batch goes straight to auto_op
+    batch = build_target_batch(output_dict, my_turret_number=my_turret_number, cache=transform_cache)
+    world_cart = batch_to_dict(batch['kind'], batch['id'], xyz_columns(batch['global']))
+    return world_cart, batch
 def rad_to_deg(rad): # because inverse kinematics returns radians and steppers need degrees
     """
     Converts radians to degrees.
     """
     return rad * (180.0 / np.pi)
-def home_axis(motor, switch_pin, toward, away, fast_step=5, slow_step=1):# needs stepper class to be updated step function
-    # Fast approach
-    steps = 0
-    while GPIO.input(switch_pin) == GPIO.LOW and steps < 20000:
-        motor.step(toward, fast_step)
-        steps += fast_step
-
-    if steps >= 20000:
-        raise RuntimeError("Homing failed (fast)")
-
-    # Back off
-    for _ in range(50):
-        motor.step(away,slow_step) #expose __step fucntion from the stepper class and add a speed/delay fucntion. 
-
-    # Slow approach
-    steps = 0
-    while GPIO.input(switch_pin) == GPIO.LOW and steps < 5000:
-        motor.step(toward,slow_step)
-        steps += slow_step
-
-    if steps >= 5000:
-        raise RuntimeError("Homing failed (slow)")
+def latch_axes(motors):
+    """Write every motor's current coil pattern to the shift register in one byte."""
+    group = motors[0].group
+    if group is not None and all(m.group is group for m in motors):
+        group.latch()
+        return
+    output = 0
+    for m in motors:
+        output |= Stepper.seq[m.step_state] << m.shifter_bit_start
+    motors[0].s.shiftByte(output)
+
+class SwitchLatch:
+    """
+    Catches a limit switch closing with GPIO.add_event_detect and records
+    the motor's step position at the edge (from its MotorState), so the
+    step loop only has to check `position` and can't miss a closure shorter
+    than a step. arm() clears it for the next edge.
+    """
+    def __init__(self, pin, motor, bouncetime=5):
+        self.pin = pin
+        self.motor = motor
+        self.position = None                # step position at the first edge since arm()
+        GPIO.add_event_detect(pin, GPIO.RISING, callback=self._edge, bouncetime=bouncetime)
+
+    def arm(self):
+        self.position = None
+
+    def _edge(self, channel):               # runs in RPi.GPIO's event thread
+        if self.position is None:
+            self.position = self.motor.motion.position
+
+    def close(self):
+        GPIO.remove_event_detect(self.pin)
+
+switch_latches = {}
+
+def switch_latch(pin, motor):
+    """The SwitchLatch on pin, made on first use (a pin takes only one edge detector)."""
+    latch = switch_latches.get(pin)
+    if latch is None:
+        latch = switch_latches[pin] = SwitchLatch(pin, motor)
+    latch.motor = motor
+    return latch
+
+# axis (shifter_bit_start) -> step position of its switch edge, in position + origin, mod a revolution
+switch_edges = {}
+
+def approach_speed(profile, max_overtravel):
+    """Fastest speed an axis can hit its switch at and still stop within max_overtravel steps past it."""
+    # one step of the budget goes to rounding in the step-by-step braking
+    return min(profile.max_speed, (profile.start_speed ** 2 + 2 * profile.accel * max(0, max_overtravel - 1)) ** 0.5)
+
+def full_search_seconds(profile, distance, top=None):
+    """
+    How long home_axes() takes to find a switch `distance` steps away by
+    the full search: accelerate all the way there (up to `top`, default
+    max_speed), brake, come back.
+    """
+    top = profile.max_speed if top is None else top
+    seconds, speed, over = 0.0, profile.start_speed, 0
+    for _ in range(distance):
+        speed = min(top, (speed * speed + 2 * profile.accel) ** 0.5)
+        seconds += 1 / speed
+    while speed > profile.start_speed:
+        speed = max(profile.start_speed, max(0.0, speed * speed - 2 * profile.accel) ** 0.5)
+        seconds += 1 / speed
+        over += 1
+    for left in range(over, 0, -1):
+        braking = (speed * speed - profile.start_speed ** 2) / (2 * profile.accel)
+        if left <= braking:
+            speed = max(profile.start_speed, max(0.0, speed * speed - 2 * profile.accel) ** 0.5)
+        else:
+            speed = min(profile.max_speed, (speed * speed + 2 * profile.accel) ** 0.5)
+        seconds += 1 / speed
+    return seconds
+
+def home_axes(motors, latches, toward, away, backoff=50, max_approach=4096, expected=None, window=64,
+              max_overtravel=64):
+    """
+    Homes several axes at once in one loop. Each axis approaches its switch
+    as fast as it can (accelerating with its profile) until its SwitchLatch
+    catches the edge, brakes, and comes back to exactly the step position
+    recorded at the edge, so there is no slow second pass. "As fast as it
+    can" is capped by approach_speed() so the braking stays within
+    max_overtravel steps past the switch (its mechanical margin). An axis whose
+    switch is already closed first backs away until it opens, then
+    `backoff` steps more. Every axis keeps its own speed and next-step
+    deadline, and every step latches one byte for all of them.
+
+    expected gives, per axis, the step position the switch triggered at
+    last time, modulo a revolution (or None). Such an axis seeks at full max_speed to `window`
+    steps short of it, braking to start speed on the way in (so the
+    overtravel cap isn't needed there), then creeps through 2 * window
+    steps; only if the switch stays open does it fall back to the full
+    search.
+
+    Returns a dict per axis: seconds until it was done, the step position
+    of the switch edge, its step counts per phase (the overtravel is the
+    'brake' count), whether the window found
+    the switch and the seconds that saved against the estimated full
+    search. Raises RuntimeError if a switch isn't found within max_approach
+    steps.
+    """
+    clock = time.perf_counter_ns
+    start = clock()
+    axes = []
+    for m, latch, t, a, e in zip(motors, latches, toward, away, expected or [None] * len(motors)):
+        latch.arm()
+        position = m.motion.position
+        if e is not None:
+            # the axis turns: the switch is also a revolution on, take the next one ahead
+            e = position + t * ((e - position) * t % Stepper.steps_per_rev)
+        pressed = GPIO.input(latch.pin) != GPIO.LOW
+        axes.append({
+            'motor': m, 'latch': latch, 'toward': t, 'away': a,
+            'top': approach_speed(m.profile, max_overtravel),
+            'phase': 'clear' if pressed else 'approach' if e is None else 'seek',
+            # never seek backwards: inside the window already, start creeping
+            'seek': None if e is None else e - t * min(window, (e - position) * t),
+            'speed': m.profile.start_speed, 'due': start, 'edge': None, 'seconds': 0.0,
+            'from': position, 'planned': 0.0, 'window_hit': False, 'saved_seconds': 0.0,
+            'steps': {'clear': 0, 'back-off': 0, 'seek': 0, 'window': 0, 'approach': 0, 'brake': 0, 'return': 0},
+        })
+    while True:
+        active = [a for a in axes if a['phase'] != 'done']
+        if not active:
+            break
+        a = min(active, key=lambda a: a['due'])
+        time.sleep(max(0, a['due'] - clock()) / 1e9)
+        m, p, prof, speed = a['motor'], a['phase'], a['motor'].profile, a['speed']
+        faster = min(a['top'], (speed * speed + 2 * prof.accel) ** 0.5)
+        slower = max(prof.start_speed, max(0.0, speed * speed - 2 * prof.accel) ** 0.5)
+        most = 2
+        if p == 'clear':
+            if GPIO.input(a['latch'].pin) == GPIO.LOW:
+                a['phase'] = 'back-off'
+                continue
+            dir, speed = a['away'], prof.start_speed
+        elif p == 'back-off':
+            if a['steps'][p] >= backoff:
+                a['latch'].arm()
+                a['phase'] = 'approach'
+                a['from'] = m.motion.position
+                continue
+            dir = a['away']
+        elif p == 'seek':                   # full speed to the cached window, arriving slow
+            left = a['seek'] - m.motion.position
+            if a['latch'].position is not None:
+                a['phase'] = 'brake'
+                continue
+            if left == 0:
+                a['phase'] = 'window'
+                continue
+            braking = (speed * speed - prof.start_speed ** 2) / (2 * prof.accel)
+            dir = 1 if left > 0 else -1
+            speed = slower if abs(left) <= braking else min(prof.max_speed, (speed * speed + 2 * prof.accel) ** 0.5)
+            most = abs(left)
+        elif p == 'window':
+            if a['latch'].position is not None:
+                a['window_hit'] = True
+                a['phase'] = 'brake'
+                continue
+            if a['steps'][p] >= 2 * window:
+                a['phase'] = 'approach'     # not where it was: full search from here
+                continue
+            dir, speed = a['toward'], prof.start_speed
+        elif p == 'approach':
+            if a['latch'].position is not None:
+                a['phase'] = 'brake'
+                continue
+            if a['steps'][p] >= max_approach:
+                raise RuntimeError(f"Homing failed: no switch on axis {motors.index(m)}")
+            dir, speed = a['toward'], faster
+        elif p == 'brake':
+            if speed <= prof.start_speed:
+                a['edge'] = a['latch'].position
+                a['phase'] = 'return'
+                continue
+            dir, speed = a['toward'], slower
+        else:   # 'return' to the edge
+            left = a['edge'] - m.motion.position
+            if left == 0:
+                a['phase'] = 'done'
+                a['seconds'] = round((clock() - start) / 1e9, 3)
+                if a['steps']['seek'] or a['steps']['window']:
+                    full = full_search_seconds(prof, abs(a['edge'] - a['from']), a['top'])
+                    a['saved_seconds'] = round(full - a['planned'], 3)
+                continue
+            braking = (speed * speed - prof.start_speed ** 2) / (2 * prof.accel)
+            dir = 1 if left > 0 else -1
+            speed = slower if abs(left) <= braking else faster
+            most = abs(left)
+        m.advance(dir, int(dir * speed), most)
+        latch_axes(motors)
+        a['steps'][p] += 1
+        if p not in ('clear', 'back-off'):
+            a['planned'] += 1 / speed       # search time on schedule, to compare with the full search
+        a['speed'] = speed
+        a['due'] += int(1e9 / speed)
+    return [{'seconds': a['seconds'], 'edge': a['edge'], 'steps': a['steps'],
+             'window_hit': a['window_hit'], 'saved_seconds': a['saved_seconds']} for a in axes]
+
 def home (pan, tilt, pan_switch, tilt_switch):
     pan_toward = 1 
     tilt_toward = 1 
     pan_away = -1
     tilt_away = -1
-    # can be put into threads for simulatnous homing 
-    # time.sleep(0.1)
-    # p = multiprocessing.Process(target=home_axis, daemon=True, args=(pan,pan_switch,pan_toward,pan_away))
-    # p.start()
-    # t = multiprocessing.Process(target=home_axis, daemon=True, args=(tilt,tilt_switch,tilt_toward,tilt_away))
-    # t.start()
-    home_axis(pan,pan_switch,pan_toward,pan_away)
-    time.sleep(0.1)
-    home_axis(tilt,tilt_switch,tilt_toward,tilt_away)
-    # p.join()
-    # t.join()
-    # print('Homing complete')
-    # small delay to ensure motors have stopped
-    time.sleep(0.5)
+    # homing drives the coils directly, so let any queued moves finish first
+    pan.wait()
+    tilt.wait()
+    # both axes at once, straight to where the switches were last time if we know
+    motors = [pan, tilt]
+    expected = [None if str(m.shifter_bit_start) not in switch_edges
+                else switch_edges[str(m.shifter_bit_start)] - m.origin for m in motors]
+    # journal the move like the workers do, so dying mid-homing leaves the axes untrusted
+    if journal is not None:
+        journal.record_motors(motors, True)
+    report = home_axes(motors, [switch_latch(pan_switch, pan), switch_latch(tilt_switch, tilt)],
+                       [pan_toward, tilt_toward], [pan_away, tilt_away], expected=expected)
+    for m, axis in zip(motors, report):
+        switch_edges[str(m.shifter_bit_start)] = (axis['edge'] + m.origin) % Stepper.steps_per_rev
+    if journal is not None:
+        journal.record_motors(motors, False)    # back on the edges
+        journal.append({'kind': 'homing', 'edges': switch_edges})
     # moving to a known position after homing
-    pan.goAngle(90)
-    tilt.goAngle(90)
-    # zeroing 
+    aim(pan, tilt, 90, 90)
+    # zeroing (queued behind the move above)
     pan.zero()
     tilt.zero()
+    pan.wait()
+    tilt.wait()
+    summary = []
+    for name, axis in zip(('pan', 'tilt'), report):
+        line = f"{name} {axis['seconds']} s / {sum(axis['steps'].values())} steps"
+        if axis['window_hit']:
+            line += f" (saved {axis['saved_seconds']} s)"
+        summary.append(line)
+    turret_state.update(status=f"Homed: {', '.join(summary)}")
+    print(f"Homing report: pan {report[0]}, tilt {report[1]}")
+    return report
  
 
 def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Ready'):
@@ -911,8 +1326,13 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
             }
 
             // ---------- STATE POLLING FROM BACKEND ----------
+            let stateVersion = null;   // newest state version we have applied
+
             function applyStateToUI(data) {
-                // Data is expected to have at least: { turrets: [...], globes: [...], current_target_index: ... }
+                // Data may be a delta: only the field groups that changed since stateVersion
+                if (typeof data.version === 'number') {
+                    stateVersion = data.version;
+                }
 
                 if (Array.isArray(data.turrets) || Array.isArray(data.globes)) {
                     mapData = {
@@ -921,10 +1341,10 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
                     };
                 }
 
-                if (typeof data.current_target_index === 'number') {
-                    currentTargetIndex = data.current_target_index;
-                } else {
-                    currentTargetIndex = -1;
+                if ('current_target_index' in data) {
+                    currentTargetIndex = typeof data.current_target_index === 'number'
+                        ? data.current_target_index
+                        : -1;
                 }
 
                 drawMap(currentTargetIndex);
@@ -932,6 +1352,17 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
                     statusArea.textContent = data.status;
                 }
 
+                // The page itself is static; laser and turret number come from here too
+                if (typeof data.laser_on === 'boolean' && laserCooldown <= 0) {
+                    laserBtn.classList.toggle('active', data.laser_on);
+                    laserBtn.innerHTML = 'LASER<br>' + (data.laser_on ? 'ON' : 'OFF');
+                    laserStatus.textContent = 'Laser is ' + (data.laser_on ? 'ACTIVE' : 'OFF');
+                    laserStatus.classList.toggle('active', data.laser_on);
+                }
+                if (typeof data.turret_number === 'string' && document.activeElement !== turretNumberInput) {
+                    turretNumberInput.value = data.turret_number;
+                }
+
                 // Optional: sync sliders with backend pan/tilt if you want
                 if (typeof data.pan === 'number') {
                     panSlider.value = data.pan;
@@ -941,6 +1372,16 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
                     tiltSlider.value = data.tilt;
                     tiltValue.textContent = data.tilt + '°';
                 }
+                // While the motors move, show where they really are
+                if ('moving' in data) {
+                    if (data.moving && typeof data.live_pan === 'number') {
+                        panValue.textContent = data.live_pan.toFixed(1) + '°';
+                        tiltValue.textContent = data.live_tilt.toFixed(1) + '°';
+                    } else {
+                        panValue.textContent = panSlider.value + '°';
+                        tiltValue.textContent = tiltSlider.value + '°';
+                    }
+                }
                 // Basic autonomous status text based on current_target_index
                 if (currentTargetIndex >= 0 && mapData.globes && mapData.globes.length > 0) {
                     autoStatusArea.textContent =
@@ -959,7 +1400,7 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
             }
 
             function fetchAndUpdateState() {
-                fetch('/state')
+                fetch(stateVersion === null ? '/state' : '/state?since=' + stateVersion)
                     .then(r => {
                         if (!r.ok) throw new Error('HTTP ' + r.status);
                         return r.json();
@@ -973,8 +1414,30 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
                     });
             }
 
-            // Poll the backend at some reasonable rate (e.g., 5 times per second)
-            setInterval(fetchAndUpdateState, 200);
+            // The server pushes state over /events only when it changes.
+            // Polling (5 times per second) is just the fallback while that is down.
+            let pollTimer = null;
+            function startPolling() {
+                if (pollTimer === null) pollTimer = setInterval(fetchAndUpdateState, 200);
+            }
+            function stopPolling() {
+                if (pollTimer !== null) {
+                    clearInterval(pollTimer);
+                    pollTimer = null;
+                }
+            }
+            if (window.EventSource) {
+                const events = new EventSource('/events');
+                events.onmessage = (e) => {
+                    stopPolling();
+                    applyStateToUI(JSON.parse(e.data));
+                };
+                // EventSource reconnects by itself; poll in the meantime
+                events.onerror = () => startPolling();
+            } else {
+                startPolling();
+            }
+            fetchAndUpdateState();  // fill in live values right away
 
             // ---------- AUTONOMOUS START / STOP ----------
             autoStartBtn.addEventListener('click', () => {
@@ -1010,6 +1473,62 @@ def web_page(laser_on='false', pan='90', tilt='90', turret_number='', status='Re
 
     return bytes(html, 'utf-8')
 
+class PageCache:
+    """
+    The control page, rendered once and kept in memory as identity, gzip and
+    deflate bytes, each with its own strong ETag. Live values (laser, pan,
+    tilt, turret number, status) are filled in by the page from /state.
+    """
+    def __init__(self, html_bytes):
+        digest = hashlib.sha1(html_bytes).hexdigest()[:16]
+        self.variants = {
+            'identity': (html_bytes, f'"{digest}"'),
+            'gzip': (gzip.compress(html_bytes, 9, mtime=0), f'"{digest}-gzip"'),
+            'deflate': (zlib.compress(html_bytes, 9), f'"{digest}-deflate"'),
+        }
+
+    def choose(self, accept_encoding):
+        """Picks the smallest variant the client accepts."""
+        accepted = set()
+        for item in accept_encoding.lower().split(','):
+            coding, _, params = item.strip().partition(';')
+            if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                continue
+            accepted.add(coding.strip())
+        for coding in ('gzip', 'deflate'):
+            if coding in accepted or '*' in accepted:
+                return coding
+        return 'identity'
+
+    def response(self, request_headers):
+        """Returns (status_code, status_text, headers, body_bytes) for GET /."""
+        coding = self.choose(request_headers.get('accept-encoding', ''))
+        body, etag = self.variants[coding]
+        headers = {
+            "Content-Type": "text/html; charset=utf-8",
+            "Cache-Control": "no-cache",      # always revalidate, a 304 is nearly free
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+        }
+        if coding != 'identity':
+            headers["Content-Encoding"] = coding
+        if_none_match = request_headers.get('if-none-match', '')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            if '*' in tags or etag in tags:
+                return "304", "Not Modified", headers, b""
+        headers["Content-Length"] = str(len(body))
+        return "200", "OK", headers, body
+
+page_cache: PageCache | None = None
+
+def get_page_cache():
+    """Builds the page cache on first use (or at startup, see __main__)."""
+    global page_cache
+    if page_cache is None:
+        page_cache = PageCache(web_page())
+    return page_cache
+
 def parse_request(request_data):
     """
     Parse POST request data from the web interface.
@@ -1058,7 +1577,9 @@ def create_turret_state():
         # --- new fields for autonomous / map integration ---
         'auto_active': False,      # True when autonomous mode is running
         'json_url': '',            # last JSON URL requested from UI
-        'current_target': ''       # string describing the current target (optional)
+        'current_target': '',      # string describing the current target (optional)
+        'target_order': [],        # planned visiting order, e.g. ['globes/3', 'turrets/2']
+        'predicted_time': 0.0      # planned total slew time in seconds
     }
 
 def create_world_state():
@@ -1075,12 +1596,63 @@ def create_world_state():
         'current_target_index': None
     }
 
-turret_state = create_turret_state()
-world_state = create_world_state()
+class SharedState:
+    """
+    Copy-on-write holder for turret_state and world_state.
+
+    Readers call snapshot() (or index the holder directly) and get a
+    read-only mapping that is never changed once published, so they take no
+    lock and can't see half an update. Writers go through update() or
+    apply(), which copy the current dict, change the copy and swap it in with
+    a single assignment; the small lock only orders writers among themselves.
+    Nested lists are always replaced, never mutated, so a shallow copy is
+    enough.
+    """
+    def __init__(self, initial):
+        self._write_lock = threading.Lock()
+        self._snapshot = MappingProxyType(dict(initial))
+
+    def snapshot(self):
+        """The current state; read several fields from one snapshot to get a consistent set."""
+        return self._snapshot
+
+    def __getitem__(self, key):
+        return self._snapshot[key]
+
+    def get(self, key, default=None):
+        return self._snapshot.get(key, default)
+
+    def update(self, **fields):
+        """Sets the given fields in one step; returns the new snapshot."""
+        with self._write_lock:
+            new = dict(self._snapshot)
+            new.update(fields)
+            self._snapshot = MappingProxyType(new)
+            return self._snapshot
+
+    def apply(self, fn, *args):
+        """
+        Runs fn(copy, *args), which edits a private copy of the state and
+        returns it (update_turret_state, update_world_state_from_global_coords),
+        and publishes the result. Returns the new snapshot.
+        """
+        with self._write_lock:
+            self._snapshot = MappingProxyType(fn(dict(self._snapshot), *args))
+            return self._snapshot
+
+turret_state = SharedState(create_turret_state())
+world_state = SharedState(create_world_state())
 
 autonomous_thread: threading.Thread | None = None
+# Held while home() drives the coils from this process: the motor worker
+# mustn't get any moves meanwhile, so motion actions are refused
+homing_lock = threading.Lock()
+MOTION_ACTIONS = ('pan', 'tilt', 'zero', 'homing', 'auto_start')
 
-stop = True
+stop_token: CancelToken | None = None  # shared with the motor workers, see __main__
+laser: LaserController | None = None
+journal: StateJournal | None = None     # warm-restart state, see restore_from_journal()
+JOURNAL_PATH = 'turret_state.journal'
 
 def update_world_state_from_global_coords(world_state: dict,
                                           coords: dict,
@@ -1249,219 +1821,679 @@ def state_to_web_params(state):
 
 
 
-def send_response(conn, status_code, status_text, headers, body_bytes):
-    conn.sendall(f"HTTP/1.1 {status_code} {status_text}\r\n".encode())
-    for name, value in headers.items():
-        conn.sendall(f"{name}: {value}\r\n".encode())
-    conn.sendall(b"\r\n")
-    if body_bytes:
-        conn.sendall(body_bytes)
-def auto_op(turret_state,targets, pan_stepper, tilt_stepper, stop_flag):
+def format_response(status_code, status_text, headers, body_bytes):
+    """Builds a whole HTTP/1.1 response so it goes out in a single write."""
+    head = f"HTTP/1.1 {status_code} {status_text}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return head.encode() + b"\r\n" + (body_bytes or b"")
+def aim(pan_stepper, tilt_stepper, pan_angle, tilt_angle):
+    """
+    Points the turret. If both motors share a StepperGroup this is one
+    coordinated move with both axes arriving together, otherwise two goAngle calls.
+    Returns a MoveHandle that finishes when the turret is on target.
+    """
+    group = pan_stepper.group
+    if group is not None and group is tilt_stepper.group:
+        angles = [None] * len(group.motors)
+        angles[pan_stepper.group_index] = pan_angle
+        angles[tilt_stepper.group_index] = tilt_angle
+        return group.move_to(*angles)
+    return pan_stepper.goAngle(pan_angle) + tilt_stepper.goAngle(tilt_angle)
+def slew_cost_matrix(pan_angles, tilt_angles, pan_profile, tilt_profile,
+                     pan_steps_per_degree=Stepper.steps_per_degree,
+                     tilt_steps_per_degree=Stepper.steps_per_degree):
+    """
+    Time in seconds to slew between every pair of aim points, where point 0 is
+    where the turret is now. Pan and tilt move together, so a move costs the
+    slower of the two axes. Angles are in degrees; steps_per_degree is per
+    axis because full-step drive takes half as many steps.
+    """
+    def axis_times(angles, profile, steps_per_degree):
+        angles = np.asarray(angles, dtype=float) % 360
+        diff = np.abs(angles[:, None] - angles[None, :])
+        turn = np.minimum(diff, 360 - diff)               # shortest path, like goAngle
+        steps = np.rint(turn * steps_per_degree).astype(int)   # goAngle rounds to the nearest step
+        times = {n: profile.duration(n) for n in np.unique(steps).tolist()}
+        return np.vectorize(times.get, otypes=[float])(steps)
+    return np.maximum(axis_times(pan_angles, pan_profile, pan_steps_per_degree),
+                      axis_times(tilt_angles, tilt_profile, tilt_steps_per_degree))
+def path_cost(cost, path):
+    return sum(cost[a][b] for a, b in zip(path, path[1:]))
+def held_karp(cost):
+    """Exact cheapest open path from node 0 through every other node."""
+    n = len(cost)
+    if n <= 2:
+        return list(range(n))
+    best = {(1 << i, i): (cost[0][i], 0) for i in range(1, n)}
+    for size in range(2, n):
+        layer = {}
+        for (visited, last), (c, _) in best.items():
+            if bin(visited).count('1') != size - 1:
+                continue
+            for nxt in range(1, n):
+                if visited & (1 << nxt):
+                    continue
+                key = (visited | (1 << nxt), nxt)
+                total = c + cost[last][nxt]
+                if key not in layer or total < layer[key][0]:
+                    layer[key] = (total, last)
+        best.update(layer)
+    full = (1 << n) - 2
+    last = min(range(1, n), key=lambda i: best[(full, i)][0])
+    path = []
+    visited = full
+    while last != 0:
+        path.append(last)
+        visited, last = visited & ~(1 << last), best[(visited, last)][1]
+    return [0] + path[::-1]
+def nearest_neighbour(cost):
+    path = [0]
+    left = set(range(1, len(cost)))
+    while left:
+        nxt = min(left, key=lambda j: cost[path[-1]][j])
+        path.append(nxt)
+        left.remove(nxt)
+    return path
+def improve_path(cost, path):
+    """2-opt and Or-opt passes over an open path (node 0 stays first) until nothing improves."""
+    path = list(path)
+    n = len(path)
+    improved = True
+    while improved:
+        improved = False
+        # 2-opt: reverse path[i..j]
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                a, b, c = path[i - 1], path[i], path[j]
+                d = path[j + 1] if j + 1 < n else None
+                before = cost[a][b] + (cost[c][d] if d is not None else 0)
+                after = cost[a][c] + (cost[b][d] if d is not None else 0)
+                if after < before - 1e-9:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    improved = True
+        # Or-opt: move a run of 1-3 targets somewhere else, scored like 2-opt
+        # by the edges it removes and inserts
+        for length in (1, 2, 3):
+            for i in range(1, n - length + 1):
+                seg = path[i:i + length]
+                rest = path[:i] + path[i + length:]
+                p, first, last = path[i - 1], seg[0], seg[-1]
+                q = path[i + length] if i + length < n else None
+                removed = cost[p][first] + (cost[last][q] - cost[p][q] if q is not None else 0)
+                best_j, best_delta = None, 0.0
+                for j in range(1, len(rest) + 1):
+                    u = rest[j - 1]
+                    v = rest[j] if j < len(rest) else None
+                    added = cost[u][first] + (cost[last][v] - cost[u][v] if v is not None else 0)
+                    if added - removed < best_delta - 1e-9:
+                        best_j, best_delta = j, added - removed
+                if best_j is not None:
+                    path = rest[:best_j] + seg + rest[best_j:]
+                    improved = True
+    return path
+def plan_target_order(targets, pan_stepper, tilt_stepper, exact_limit=8):
+    """
+    Orders the targets in a build_target_batch() batch (our own turret left
+    out) to keep total slew time down, starting from the current pan/tilt.
+    Up to exact_limit targets are solved exactly, more use nearest-neighbour
+    followed by 2-opt/Or-opt.
+    Returns (row indices into the batch in visiting order, predicted seconds).
+    """
+    rows = np.flatnonzero(~targets['is_self'])
+    if len(rows) == 0:
+        return [], 0.0
+    pan_angles = np.concatenate(([pan_stepper.angle], rad_to_deg(targets['theta1'][rows])))
+    tilt_angles = np.concatenate(([tilt_stepper.angle], rad_to_deg(targets['theta2'][rows])))
+    cost = slew_cost_matrix(pan_angles, tilt_angles, pan_stepper.profile, tilt_stepper.profile,
+                            pan_stepper.drive_steps_per_degree, tilt_stepper.drive_steps_per_degree).tolist()
+    if len(rows) <= exact_limit:
+        path = held_karp(cost)
+    else:
+        path = improve_path(cost, nearest_neighbour(cost))
+    return [int(rows[k - 1]) for k in path[1:]], path_cost(cost, path)
+def auto_op(turret_state,targets, pan_stepper, tilt_stepper, stop_token, since=None):
     """
     Autonomous operation function to aim at targets sequentially.
 
     Args:
-        targets: list of target dicts with 'pan' and 'tilt' angles
+        turret_state: SharedState the progress is reported to
+        targets: batch from build_target_batch() with 'theta1'/'theta2' arrays
         pan_stepper: Stepper instance for pan motor
         tilt_stepper: Stepper instance for tilt motor
-        stop_flag: boolean flag to signal stopping the operation
+        stop_token: CancelToken shared with the motors; cancel() stops the
+            sequence and the move in progress
+        since: stop_token.generation when the sequence was requested
     """
-    angles = inverse_kinematics(targets)
-    for key in angles:
-        for items in angles[key]:
-            if stop_flag:
-                break
-            if turret_state.get('turret_number') !=angles['turrets'][items]:
-                pan_angle = rad_to_deg(float(angles[key][items].get('theta1')))
-                tilt_angle = rad_to_deg(float(angles[key][items].get('theta2')))
-                turret_state['status'] = f"Aiming at target (pan: {pan_angle}°, tilt: {tilt_angle}°)"
-            else:
-                pan_angle = None
-                tilt_angle = None
-            if pan_angle is not None:
-                pan_stepper.goAngle(pan_angle)
-                turret_state['pan'] = pan_angle
-
-            if tilt_angle is not None:
-                tilt_stepper.goAngle(tilt_angle)
-                turret_state['tilt'] = tilt_angle
-
-            time.sleep(1.0)  # Adjust delay as needed
+    if since is None:
+        since = stop_token.generation
+    pan_angles = rad_to_deg(targets['theta1']).tolist()
+    tilt_angles = rad_to_deg(targets['theta2']).tolist()
+    order, predicted = plan_target_order(targets, pan_stepper, tilt_stepper)
+    turret_state.update(target_order=[f"{targets['kind'][i]}/{targets['id'][i]}" for i in order],
+                        predicted_time=round(predicted, 2))
+    for i in order:
+        if stop_token.cancelled(since):
+            break
+        pan_angle = pan_angles[i]
+        tilt_angle = tilt_angles[i]
+        move = aim(pan_stepper, tilt_stepper, pan_angle, tilt_angle)
+        turret_state.update(status=f"Aiming at target (pan: {pan_angle}°, tilt: {tilt_angle}°)",
+                            pan=pan_angle, tilt=tilt_angle)
+
+        move.wait()  # exactly as long as the motion takes
+
+    if stop_token.cancelled(since):
+        # the last move ramped down early, report where the turret really is
+        turret_state.update(auto_active=False,
+                            pan=pan_stepper.angle,
+                            tilt=tilt_stepper.angle,
+                            status="Autonomous operation stopped")
+    else:
+        turret_state.update(auto_active=False, status="Autonomous operation complete")
 
-    turret_state['auto_active'] = False
-    turret_state['status'] = "Autonomous operation complete"
+class StateStore:
+    """
+    Versioned JSON view of world_state + turret_state for /state and /events.
+
+    Fields are split into groups: 'map' (turret and globe geometry),
+    'target' (current_target_index), 'turret' (status, laser, pan, tilt...)
+    and 'motion' (where the motors really are, read from their MotorState
+    blocks, so it changes on every poll while a move runs).
+    refresh() gives a group a new version number whenever it changes and
+    caches its serialized JSON, so unchanged groups are never re-encoded.
+    body(since) returns only the groups newer than `since`, plus the current
+    version; the map geometry therefore goes out once per mission, not on
+    every poll.
+
+    The map group is compared by identity: update_world_state_from_global_coords
+    always installs fresh lists. Both states are read from one snapshot
+    each, and if neither snapshot (nor the laser) has changed since the last
+    call there is nothing to compare at all. Versions start from the wall
+    clock, so after a restart a client's old version is older than
+    everything and it gets a full state. Only call this from the event loop
+    thread.
+    """
+    def __init__(self):
+        self.version = int(time.time() * 1000)
+        self.groups = {}                    # name -> (version, values, JSON fragment)
+        self._full = (None, b"")            # (version, body) of the last full response
+        self._seen = None                   # (world snapshot, turret snapshot, laser) last looked at
+
+    @staticmethod
+    def _live(motor):
+        """(angle in degrees, moving) from a motor's shared state."""
+        if motor is None:
+            return None, False
+        position, target, velocity, flags = motor.motion.read()
+        return round(position / Stepper.steps_per_degree % 360, 2), bool(flags & MotorState.MOVING)
+
+    def _current(self, world, turret, laser_on, live):
+        (pan_live, pan_moving), (tilt_live, tilt_moving) = live
+        return {
+            'map': {'turrets': world.get('turrets', []), 'globes': world.get('globes', [])},
+            'target': {'current_target_index': world.get('current_target_index')},
+            'turret': {
+                'status': turret.get('status', 'Ready'),
+                'laser_on': laser_on,
+                'pan': turret.get('pan', 90),
+                'tilt': turret.get('tilt', 90),
+                'auto_active': turret.get('auto_active', False),
+                'turret_number': turret.get('turret_number', ''),
+                'target_order': turret.get('target_order', []),
+                'predicted_time': turret.get('predicted_time', 0.0),
+            },
+            'motion': {'live_pan': pan_live, 'live_tilt': tilt_live, 'moving': pan_moving or tilt_moving},
+        }
 
-def handle_client(conn):
-    global turret_state, world_state, stop, pan, tilt, autonomous_thread,laser_pin
-    request = conn.recv(4096).decode('utf-8', errors='ignore')
-    if not request:
+    @staticmethod
+    def _same(name, old, new):
+        if name == 'map':
+            return old['turrets'] is new['turrets'] and old['globes'] is new['globes']
+        return old == new
+
+    def refresh(self):
+        """Picks up changes; returns the current version."""
+        world, turret = world_state.snapshot(), turret_state.snapshot()
+        laser_on = laser.is_on if laser is not None else turret.get('laser_on', False)
+        live = (self._live(pan), self._live(tilt))
+        seen = (world, turret, laser_on, live)
+        if self._seen is not None and all(a is b for a, b in zip(seen[:3], self._seen)) \
+                and live == self._seen[3]:
+            return self.version
+        self._seen = seen
+        for name, values in self._current(world, turret, laser_on, live).items():
+            cached = self.groups.get(name)
+            if cached is not None and self._same(name, cached[1], values):
+                continue
+            self.version += 1
+            fragment = json.dumps(values)[1:-1].encode('utf-8')   # the fields without the braces
+            self.groups[name] = (self.version, values, fragment)
+        return self.version
+
+    def body(self, since=None):
+        """JSON bytes with every group newer than `since` (all of them if None)."""
+        version = self.refresh()
+        if since is None or since > version:
+            if self._full[0] == version:
+                return self._full[1]
+            since = None
+        parts = [fragment for v, _, fragment in self.groups.values() if since is None or v > since]
+        parts.append(f'"version": {version}'.encode())
+        body = b"{" + b", ".join(parts) + b"}"
+        if since is None:
+            self._full = (version, body)
+        return body
+
+state_store = StateStore()
+
+def state_json(since=None):
+    """world_state plus the turret fields the page shows, as JSON bytes for GET /state."""
+    return state_store.body(since)
+
+def journal_turret():
+    """Log the turret number, JSON URL and loaded map so a restart can put them back."""
+    if journal is None:
         return
+    state, world = turret_state.snapshot(), world_state.snapshot()
+    journal.append({
+        'kind': 'turret',
+        'turret_number': state.get('turret_number', ''),
+        'json_url': state.get('json_url', ''),
+        'turrets': world.get('turrets', []),
+        'globes': world.get('globes', []),
+    })
 
-    # ----- Parse request line -----
-    lines = request.split('\r\n')
-    request_line = lines[0]
+def restore_from_journal(journal, motors):
+    """
+    Warm restart: put back each motor's step position, phase and origin,
+    where its switch was last homed and the turret fields from the journal.
+    A motor whose last record was taken just before a move (we stopped
+    mid-move) isn't trusted and needs homing. The coils are latched once,
+    after every motor's phase is back. Call before the motor workers start.
+    Returns the status message.
+    """
+    start = time.perf_counter()
+    saved = StateJournal.latest(journal.records())
+    restored, lost = [], []
+    for name, m in zip(('pan', 'tilt'), motors):
+        entry = saved['motors'].get(str(m.shifter_bit_start))
+        if entry is None:
+            continue                        # nothing saved yet
+        try:
+            position, phase, moving = int(entry['position']), int(entry['phase']), bool(entry['moving'])
+        except (TypeError, KeyError, ValueError):
+            lost.append(name)
+            continue
+        if moving or not 0 <= phase < 8:
+            lost.append(name)
+            continue
+        m.restore(position, phase, int(entry.get('origin', 0)))
+        restored.append(name)
+        edges = saved['homing'] and saved['homing'].get('edges', {})
+        if edges and str(m.shifter_bit_start) in edges:
+            switch_edges[str(m.shifter_bit_start)] = int(edges[str(m.shifter_bit_start)])
+    if restored:
+        latch_axes(motors)
+    turret = saved['turret']
+    if turret is not None:
+        turret_state.update(turret_number=str(turret.get('turret_number', '')),
+                            json_url=str(turret.get('json_url', '')))
+        world_state.update(turrets=list(turret.get('turrets', [])), globes=list(turret.get('globes', [])))
+    if not restored and not lost:
+        return 'Ready'
+    status = f"Restored {', '.join(restored) or 'nothing'} in {(time.perf_counter() - start) * 1000:.0f} ms"
+    if lost:
+        status += f"; {', '.join(lost)} stopped mid-move, run homing"
+    return status
+
+def run_homing(*args):
+    """Background half of the homing action: home(*args), then let motion actions through again."""
     try:
-        method, full_path, _ = request_line.split(' ')
-    except ValueError:
-        # malformed request line
-        send_response(conn, "400", "Bad Request", {"Content-Length": "0"}, b"")
-        return
-
-    # Split off query string if present
-    path, _, query = full_path.partition('?')
-
-    # ----- Find body (for POST) -----
-    # Headers end at blank line: "\r\n\r\n"
-    sep = request.find('\r\n\r\n')
-    if sep != -1:
-        body = request[sep+4:]
-    else:
-        body = ""
+        home(*args)
+    except RuntimeError as e:
+        turret_state.update(status=str(e))
+    finally:
+        homing_lock.release()
 
-    # ========== ROUTING LOGIC ==========
+def run_autonomous(url, my_turret_number, since):
+    """
+    Background half of auto_start: fetch the targets (up to the 10 s request
+    timeout), put them on the map, then run auto_op. Any error (our turret
+    missing from the JSON, null coordinates...) ends autonomous mode with
+    the error as the status instead of killing the thread.
+    """
+    try:
+        result = fetch_and_parse_positions(url, my_turret_number=my_turret_number)
+        if result is None:
+            turret_state.update(auto_active=False, status='Could not fetch target positions')
+            return
+        world_cart_dict, targets = result
+        world_state.apply(update_world_state_from_global_coords, world_cart_dict)
+        journal_turret()
+        auto_op(turret_state, targets, pan, tilt, stop_token, since)
+    except Exception as e:
+        print(f"Autonomous mode failed: {e!r}")
+        turret_state.update(auto_active=False, status=f"Autonomous mode failed: {e!r}")
+
+def handle_action(parsed):
+    """
+    Carries out one UI action from POST / (laser, pan, tilt, auto_start, etc.).
+    Runs on the action executor, never on the event loop.
+    """
+    global autonomous_thread
+    action = parsed.get('action')
+    if action in MOTION_ACTIONS and homing_lock.locked():
+        turret_state.update(status=f"Homing in progress, {action} ignored")
+        return
+    state = turret_state.apply(update_turret_state, parsed)
+    if action == 'laser':
+        # The controller's timer turns it off again; this returns right away
+        if parsed.get('state') == 'on':
+            if laser.fire(3.0):
+                print(f"Laser turned on")
+            else:
+                turret_state.update(status='Laser cooling down, shot ignored')
+        else:
+            laser.off()
+    if action == 'pan':
+        # Slider drags send a stream of these: the newest angle replaces the
+        # one the motor is heading for, even mid-move
+        angle = state['pan']
+        pan.track(float(angle))
+        print(f"Pan moved to {angle}°")
+    elif action == 'tilt':
+        angle = state['tilt']
+        tilt.track(float(angle))
+        print(f"Tilt moved to {angle}°")
+    elif action == 'zero':
+        # Use your own zeroing logic; here we just move to 0°
+        pan.zero()
+        tilt.zero()
+        print("Turret zeroed")
+    elif action == 'homing':
+        if autonomous_thread is not None and autonomous_thread.is_alive():
+            turret_state.update(status='Stop autonomous mode before homing')
+            return
+        # Homing takes a while, run it in its own thread; actions run one at
+        # a time, so nothing can slip in between the check above and this
+        homing_lock.acquire()
+        threading.Thread(
+            target=run_homing,
+            args=(pan, tilt,tilt_switch_pin,pan_switch_pin),
+            daemon=True
+        ).start()
+        print("Homing sequence started")
+    elif action == 'turret_number':
+        journal_turret()
+    elif action == 'auto_start':
+        journal_turret()
+        # Fetching the JSON and the sequence itself both happen in the background thread
+        url = state['json_url']
+        my_turret_num = state['turret_number']
+        since = stop_token.generation
+        if autonomous_thread is None or not autonomous_thread.is_alive():
+            autonomous_thread = threading.Thread(
+                target=run_autonomous,
+                args=(url, my_turret_num, since),
+                daemon=True
+            )
+            autonomous_thread.start()
+        print("Autonomous sequence started")
+    elif action == 'auto_stop':
+        # Stops the sequence and ramps down the move in progress
+        stop_token.cancel()
+        print("Autonomous sequence stopped by user")
+    elif action == 'auto_complete':
+        # Usually called from front-end animation when it's done,
+        # but your backend can also decide when it's complete.
+        print("Autonomous sequence complete")
 
-    # 1) GET /  -> main HTML page
+def handle_request(method, path, query, body, headers=None):
+    """
+    Routes one request. Returns (status_code, status_text, headers, body_bytes);
+    the connection handler adds the Connection headers.
+    """
+    # 1) GET /  -> main HTML page, pre-rendered and precompressed
     if method == 'GET' and path == '/':
-        params = state_to_web_params(turret_state)
-        html_bytes = web_page(**params)
-        headers = {
-            "Content-Type": "text/html; charset=utf-8",
-            "Content-Length": str(len(html_bytes)),
-            "Connection": "close"
-        }
-        send_response(conn, "200", "OK", headers, html_bytes)
-
-    # 2) GET /state  -> JSON state for map
-    elif method == 'GET' and path == '/state':
-        combined = dict(world_state)  # shallow copy
-        combined.update({
-        'status': turret_state.get('status', 'Ready'),
-        'laser_on': turret_state.get('laser_on', False),
-        'pan': turret_state.get('pan', 90),
-        'tilt': turret_state.get('tilt', 90),
-        'auto_active': turret_state.get('auto_active', False),
-        'turret_number': turret_state.get('turret_number', ''),
-        })
-        body_json = world_state_to_json(combined).encode('utf-8')
+        return get_page_cache().response(headers or {})
+
+    # 2) GET /state  -> JSON state for map (?since=<version> for just what changed)
+    if method == 'GET' and path == '/state':
+        try:
+            since = int(parse_request(query).get('since', ''))
+        except ValueError:
+            since = None
+        body_json = state_json(since)
         headers = {
             "Content-Type": "application/json",
             "Content-Length": str(len(body_json)),
-            "Connection": "close"
-        }
-        send_response(conn, "200", "OK", headers, body_json)
-
-    # 3) POST /  -> UI actions from JS (laser, pan, tilt, auto_start, etc.)
-    elif method == 'POST' and path == '/':
-        parsed = parse_request(body)              # e.g. {"action": "pan", "angle": "45"}
-        turret_state = update_turret_state(turret_state, parsed)
-        action = parsed.get('action')
-        if action == 'laser':
-            # Move pan motor to new angle in turret_state
-            fire(laser_pin)
-            # Replace this with your real motor API
-            print(f"Laser turned on")
-        if action == 'pan':
-            # Move pan motor to new angle in turret_state
-            angle = turret_state['pan']
-            # Replace this with your real motor API
-            pan.goAngle(float(angle))
-            print(f"Pan moved to {angle}°")
-        elif action == 'tilt':
-            angle = turret_state['tilt']
-            tilt.goAngle(float(angle))
-            print(f"Tilt moved to {angle}°")
-        elif action == 'zero':
-            # Use your own zeroing logic; here we just move to 0°
-            pan.zero()
-            tilt.zero()
-            print("Turret zeroed")
-        elif action == 'homing':
-            # Run homing routine (might block, so consider a thread if long)
-            # Example: run in a separate thread so HTTP call returns quickly
-            threading.Thread(
-                target=home,
-                args=(pan, tilt,tilt_switch_pin,pan_switch_pin),
-                daemon=True
-            ).start()
-            print("Homing sequence started")
-        elif action == 'auto_start':
-            # Kick off autonomous operation using turret_state['json_url']
-            url = turret_state['json_url']
-            my_turret_num = turret_state['turret_number']
-            stop = False
-            world_cart_dict,targets = fetch_and_parse_positions(url,my_turret_number=my_turret_num)
-            world_state = update_world_state_from_global_coords(world_state, world_cart_dict)
-            # Optionally: parse JSON here, update world_state, etc.
-            # Then start a background thread to run the sequence.
-            if autonomous_thread is None or not autonomous_thread.is_alive():
-                autonomous_thread = threading.Thread(
-                    target=auto_op,
-                    args=(turret_state,targets, pan, tilt,stop),
-                    daemon=True
-                )
-                autonomous_thread.start()
-            print("Autonomous sequence started")
-        elif action == 'auto_stop':
-            # You decide how to signal stop:
-            # e.g., set a flag that run_autonomous() checks periodically
-            turret_state['auto_active'] = False
-            stop = True
-            print("Autonomous sequence stopped by user")
-        elif action == 'auto_complete':
-            # Usually called from front-end animation when it's done,
-            # but your backend can also decide when it's complete.
-            turret_state['auto_active'] = False
-            print("Autonomous sequence complete")
-        # 4) Tell browser "OK, no content"
-        headers = {
-            "Content-Length": "0",
-            "Connection": "close"
         }
-        send_response(conn, "204", "No Content", headers, b"")
-        state_to_web_params(turret_state)
+        return "200", "OK", headers, body_json
+
+    # 3) POST /  -> UI actions from JS, then "OK, no content"
+    if method == 'POST' and path == '/':
+        handle_action(parse_request(body))      # e.g. {"action": "pan", "angle": "45"}
+        return "204", "No Content", {"Content-Length": "0"}, b""
 
     # 4) Anything else -> 404
-    else:
-        headers = {
-            "Content-Length": "0",
-            "Connection": "close"
-        }
-        send_response(conn, "404", "Not Found", headers, b"")
+    return "404", "Not Found", {"Content-Length": "0"}, b""
 
-def run_server(host='', port=80):
+class StatePublisher:
     """
-    Minimal blocking HTTP server using sockets.
+    Pushes state to every /events (Server-Sent Events) subscriber when it changes.
+
+    One task checks state_store every `interval` seconds while anyone is
+    subscribed and fans a new version out to bounded per-client queues. Each
+    stream sends the groups changed since the version it last sent (the
+    first event is the full state), so a client whose queue is full can just
+    drop its oldest entry; a client that can't take a write within
+    WRITE_TIMEOUT is disconnected. Idle streams get a heartbeat comment.
     """
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind((host, port))
-    s.listen(1)
-    print(f"Serving on http://{host}:{port}")
-
+    def __init__(self, interval=0.05, heartbeat=15.0, queue_size=4, max_subscribers=32):
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers = set()
+        self.last = None
+
+    def subscribe(self):
+        """Returns a queue primed with the current version, or None if we are full."""
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        queue = asyncio.Queue(self.queue_size)
+        version = state_store.refresh()
+        queue.put_nowait(version)
+        if not self.subscribers:
+            self.last = version             # nobody else is waiting on a newer change
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, version):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()          # coalesce: the stream sends everything since what it last sent
+            queue.put_nowait(version)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.subscribers:
+                self.last = None
+                continue
+            version = state_store.refresh()
+            if version != self.last:
+                self.last = version
+                self.publish(version)
+
+publisher: StatePublisher | None = None
+
+async def stream_events(writer):
+    """Serves GET /events until the client goes away or falls too far behind."""
+    queue = publisher.subscribe() if publisher is not None else None
+    if queue is None:
+        writer.write(format_response("503", "Service Unavailable",
+                                     {"Content-Length": "0", "Connection": "close"}, b""))
+        await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+        return
     try:
+        writer.write(format_response("200", "OK", {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }, b"retry: 2000\n\n"))
+        sent = None                         # version the client has
         while True:
-            conn, addr = s.accept()
             try:
-                handle_client(conn)
-            finally:
-                conn.close()
+                await asyncio.wait_for(queue.get(), publisher.heartbeat)
+                if state_store.refresh() == sent:
+                    continue                # an earlier event already carried this one
+                payload = state_json(sent)
+                sent = state_store.version
+                writer.write(b"data: " + payload + b"\n\n")
+            except asyncio.TimeoutError:
+                writer.write(b": ping\n\n")
+            await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
     finally:
-        s.close()
+        publisher.unsubscribe(queue)
+
+READ_TIMEOUT = 10     # seconds to receive the rest of a request once it has started
+IDLE_TIMEOUT = 15     # seconds a keep-alive connection may sit between requests
+WRITE_TIMEOUT = 10    # seconds for the client to take a response
+MAX_BODY = 64 * 1024
+
+# One thread for UI actions keeps them in the order they arrived
+action_executor = ThreadPoolExecutor(max_workers=1)
+
+async def read_request(reader):
+    """Reads the headers and body of a request whose request line was already read."""
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b"", None)
+        if line in (b'\r\n', b'\n'):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+        if len(headers) > 100:
+            raise ValueError("too many headers")
+    length = int(headers.get('content-length', '0'))
+    if length < 0 or length > MAX_BODY:
+        raise ValueError("bad Content-Length")
+    body = await reader.readexactly(length) if length else b""
+    return headers, body.decode('utf-8', errors='ignore')
+
+async def handle_connection(reader, writer):
+    """Serves requests on one connection until the client closes it or goes quiet."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not line:
+                    break
+                if line in (b'\r\n', b'\n'):
+                    continue                # stray newline between requests
+                method, full_path, version = line.decode('latin-1').split()
+                headers, body = await asyncio.wait_for(read_request(reader), READ_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            except ValueError:
+                # malformed request line or headers, or a line over the stream limit
+                writer.write(format_response("400", "Bad Request",
+                                             {"Content-Length": "0", "Connection": "close"}, b""))
+                await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+                break
+
+            # Split off query string if present
+            path, _, query = full_path.partition('?')
+            if method == 'GET' and path == '/events':
+                await stream_events(writer)     # the stream uses up the connection
+                break
+            if method == 'POST':
+                # actions may touch the motors, laser or network: keep them off the loop
+                response = await loop.run_in_executor(action_executor, handle_request,
+                                                      method, path, query, body, headers)
+            else:
+                response = handle_request(method, path, query, body, headers)
+
+            connection = headers.get('connection', '').lower()
+            if version == 'HTTP/1.1':
+                keep_alive = connection != 'close'
+            else:
+                keep_alive = connection == 'keep-alive'
+            status_code, status_text, response_headers, body_bytes = response
+            response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+            if keep_alive:
+                response_headers["Keep-Alive"] = f"timeout={IDLE_TIMEOUT}"
+            writer.write(format_response(status_code, status_text, response_headers, body_bytes))
+            await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+            ConnectionError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve(host='', port=80, backlog=64, ready=None):
+    global publisher
+    publisher = StatePublisher()
+    publisher_task = asyncio.create_task(publisher.run())
+    server = await asyncio.start_server(handle_connection, host or None, port,
+                                        backlog=backlog, reuse_address=True)
+    print(f"Serving on http://{host}:{port}")
+    if ready is not None:
+        # e.g. starting the motor worker: in a thread, the page is served meanwhile
+        asyncio.get_running_loop().run_in_executor(None, ready)
+    async with server:
+        await server.serve_forever()
+
+def run_server(host='', port=80, backlog=64, ready=None):
+    """
+    asyncio HTTP/1.1 server with keep-alive. GETs are answered on the event
+    loop; POST actions run on action_executor so a slow one never holds up /state.
+    ready() is called in a background thread once the port is bound.
+    """
+    asyncio.run(serve(host, port, backlog, ready))
 
 # --- Main execution block ---
 if __name__ == "__main__":
 
+    init_hardware()
     s = Shifter(data=16, latch=20, clock=21)
     
-    # Set up shared output value
-    Stepper.shifter_outputs = multiprocessing.Value('i', 0)
-    Stepper.shift_lock = multiprocessing.Lock()
+    # Set up shared output value (from Stepper.ctx so the motor workers can use it)
+    Stepper.shifter_outputs = Stepper.ctx.Value('i', 0)
+    Stepper.shift_lock = Stepper.ctx.Lock()
+    
+    lock1 = Stepper.ctx.Lock()
+    lock2 = Stepper.ctx.Lock()
+    
+    laser = LaserController(laser_pin)
     
-    lock1 = multiprocessing.Lock()
-    lock2 = multiprocessing.Lock()
+    # One stop signal for both motors and the autonomous sequence
+    stop_token = CancelToken()
+    
+    # Positions and settings from the last run, logged at every move boundary
+    journal = StateJournal(JOURNAL_PATH, ctx=Stepper.ctx)
     
     # Instantiate motors with parallel_drive enabled
-    pan = Stepper(s, lock1, parallel_drive=False)
-    tilt = Stepper(s, lock2, parallel_drive=False)
-
-    run_server(host='', port=80)
+    pan = Stepper(s, lock1, parallel_drive=False, cancel=stop_token, journal=journal)
+    tilt = Stepper(s, lock2, parallel_drive=False, cancel=stop_token, journal=journal)
+    # One worker drives both motors (single writer for the shift register);
+    # it is started once the port is bound, so the first page doesn't wait
+    # for the forkserver (a move before then starts it itself)
+    axes = StepperGroup(pan, tilt)
+    turret_state.update(status=restore_from_journal(journal, [pan, tilt]))
+
+    get_page_cache()    # render and compress the page once, before serving
+    run_server(host='', port=int(sys.argv[1]) if len(sys.argv) > 1 else 80, ready=axes.start)
@@ -0,0 +1,158 @@
+# Append-only state journal for warm restarts
+
+import json
+import mmap
+import os
+import struct
+import zlib
+import multiprocessing
+
+class StateJournal:
+    """
+    Append-only, memory-mapped journal of the state we need after a restart
+    (motor step positions and phases, turret number, JSON URL, loaded map,
+    where the limit switches were).
+
+    Each record is a header (magic, epoch, length, CRC-32 of the payload)
+    followed by a JSON payload. Readers stop at the first record that
+    doesn't check out, so a write torn by a crash or power cut just ends the
+    journal one record early. The file is split into two halves: when the
+    active half fills up, the latest state is written to the start of the
+    other half as a single 'snapshot' record under the next epoch and
+    appending carries on there. Until that record's header is written the
+    old half is still the newest valid one, so there is always a good copy.
+
+    Writes go through a lock and a shared offset created from `ctx`, so the
+    motor workers can append too; a copy sent to a worker maps the same
+    file. append(sync=True) flushes the written pages to disk before
+    returning.
+    """
+    MAGIC = b'TJ01'
+    HEADER = struct.Struct('<4sQII')        # magic, epoch, payload length, crc32
+
+    def __init__(self, path, ctx=None, half_size=1 << 19):
+        ctx = ctx if ctx is not None else multiprocessing
+        self.path = path
+        self.half_size = half_size
+        self._lock = ctx.Lock()
+        self._half = ctx.RawValue('i', 0)   # which half we append to
+        self._epoch = ctx.RawValue('Q', 0)
+        self._offset = ctx.RawValue('q', 0) # next free byte in that half
+        self._open()
+        half, epoch, records, end = max(((h,) + self.__scan(h) for h in (0, 1)),
+                                        key=lambda found: (found[1], found[0]))
+        if epoch == 0:                      # empty or unreadable journal: start afresh
+            half, end = 0, 0
+            epoch = 1
+        self._half.value = half
+        self._epoch.value = epoch
+        self._offset.value = end
+
+    def _open(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(fd).st_size < 2 * self.half_size:
+            os.ftruncate(fd, 2 * self.half_size)
+        self._fd = fd
+        self._map = mmap.mmap(fd, 2 * self.half_size)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_fd'], state['_map']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __scan(self, half):
+        """(epoch, records, end offset) of the valid records at the start of a half."""
+        base = half * self.half_size
+        records = []
+        offset = 0
+        epoch = None
+        while offset + self.HEADER.size <= self.half_size:
+            magic, rec_epoch, length, crc = self.HEADER.unpack_from(self._map, base + offset)
+            start = offset + self.HEADER.size
+            if magic != self.MAGIC or start + length > self.half_size or \
+                    (epoch is not None and rec_epoch != epoch):
+                break
+            payload = self._map[base + start:base + start + length]
+            if zlib.crc32(payload) != crc:
+                break
+            try:
+                records.append(json.loads(payload))
+            except ValueError:
+                break
+            epoch = rec_epoch
+            offset = start + length
+        return (epoch or 0), records, offset
+
+    def records(self):
+        """Every valid record in the active half, oldest first."""
+        with self._lock:
+            return self.__scan(self._half.value)[1]
+
+    def append(self, record, sync=True):
+        """Add one record (a JSON-able dict with a 'kind'); with sync, it is on disk on return."""
+        payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            if self._offset.value + self.HEADER.size + len(payload) > self.half_size:
+                self.__compact()
+            self.__write(payload, sync)
+
+    def __write(self, payload, sync):
+        base = self._half.value * self.half_size
+        offset = self._offset.value
+        start = base + offset + self.HEADER.size
+        self._map[start:start + len(payload)] = payload
+        # header last: until it is there, the record doesn't exist
+        self.HEADER.pack_into(self._map, base + offset, self.MAGIC, self._epoch.value,
+                              len(payload), zlib.crc32(payload))
+        self._offset.value = offset + self.HEADER.size + len(payload)
+        if sync:
+            page = (base + offset) - (base + offset) % mmap.PAGESIZE
+            self._map.flush(page, start + len(payload) - page)
+
+    def __compact(self):
+        """Start the other half with a snapshot of the latest state (lock held)."""
+        snapshot = self.latest(self.__scan(self._half.value)[1])
+        self._half.value = 1 - self._half.value
+        self._epoch.value += 1
+        self._offset.value = 0
+        # one record, one CRC: the new half is either the whole snapshot or invalid
+        self.__write(json.dumps({'kind': 'snapshot', 'state': snapshot},
+                                separators=(',', ':')).encode('utf-8'), True)
+
+    @staticmethod
+    def latest(records):
+        """
+        Folds records into the newest state: {'motors': {axis: entry}} plus
+        the last record of every other kind under its kind ('turret', ...;
+        None if there is none). A 'snapshot' record carries a whole state.
+        """
+        state = {'motors': {}, 'turret': None, 'homing': None}
+        for record in records:
+            kind = record.get('kind')
+            if kind == 'motors':
+                state['motors'].update(record.get('axes', {}))
+            elif kind == 'snapshot':
+                for kind, latest in record.get('state', {}).items():
+                    if kind == 'motors':
+                        state['motors'].update(latest)
+                    else:
+                        state[kind] = latest
+            else:
+                state[kind] = record
+        return state
+
+    def record_motors(self, motors, moving):
+        """Log where motors are at a move boundary (moving=True just before a move starts)."""
+        self.append({'kind': 'motors', 'axes': {
+            str(m.shifter_bit_start): {'position': m.motion.position, 'phase': m.step_state,
+                                       'origin': m.origin, 'moving': moving}
+            for m in motors
+        }})
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
@@ -3,16 +3,21 @@
 from RPi import GPIO
 from time import sleep
 
-GPIO.setwarnings(False)   # <— add this line
-
-GPIO.setmode(GPIO.BCM)
-
 class Shifter():
 
     def __init__(self, data, clock, latch):
         self.dataPin = data
         self.latchPin = latch
         self.clockPin = clock
+        self.claim()
+
+    def __setstate__(self, state):  # unpickled in a motor worker: claim the pins there too
+        self.__dict__.update(state)
+        self.claim()
+
+    def claim(self):  # GPIO setup happens here, not at import
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
         GPIO.setup(self.dataPin, GPIO.OUT)
         GPIO.setup(self.latchPin, GPIO.OUT)
         GPIO.setup(self.clockPin, GPIO.OUT)
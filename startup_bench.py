@@ -0,0 +1,83 @@
+# Startup budget for enme441final.py: import cost and time to first page
+#
+#   python3 startup_bench.py                # 5 runs on port 8080
+#   python3 startup_bench.py --runs 10 --port 8081 --top 15
+#
+# Import cost comes from `python -X importtime -c "import enme441final"`,
+# startup from spawning `python enme441final.py <port>` until GET / answers.
+# The server runs in a scratch directory so it doesn't touch the real journal.
+
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(HERE, 'enme441final.py')
+
+def environment():
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (HERE, env.get('PYTHONPATH')) if p)
+    return env
+
+def import_times(cwd):
+    """{module: (self us, cumulative us)} from one -X importtime run of `import enme441final`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import enme441final'],
+                            cwd=cwd, env=environment(), capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+def first_page(port, cwd, timeout=60.0):
+    """Seconds from spawning the server until it answers GET / with a status line."""
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, SCRIPT, str(port)], cwd=cwd, env=environment(),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1) as conn:
+                    conn.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+                    if conn.recv(12).startswith(b'HTTP/1.1 200'):
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"no page within {timeout} s")
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)   # the motor workers too
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup budget for enme441final.py')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        runs = [import_times(cwd) for _ in range(args.runs)]
+        total = statistics.median(r['enme441final'][1] for r in runs) / 1000
+        print(f"import enme441final: {total:.1f} ms (median of {args.runs})")
+        last = runs[-1]
+        print("slowest imports (cumulative ms, last run):")
+        for name, (own, cumulative) in sorted(last.items(), key=lambda item: -item[1][1])[1:args.top + 1]:
+            print(f"  {cumulative / 1000:8.1f}  {name}")
+
+        pages = [first_page(args.port, cwd) for _ in range(args.runs)]
+        print(f"process start to first page: {statistics.median(pages) * 1000:.0f} ms "
+              f"(median of {args.runs}, min {min(pages) * 1000:.0f}, max {max(pages) * 1000:.0f})")
+
+if __name__ == '__main__':
+    main()
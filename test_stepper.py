@@ -0,0 +1,33 @@
+# Regression checks for Stepper; drives the real shift register pins, so run on the Pi:
+#   python3 -m unittest test_stepper
+
+import unittest
+
+try:
+    from Stepper import Stepper
+    from shifter import Shifter
+except ImportError:                         # no RPi.GPIO off the Pi
+    Stepper = None
+
+@unittest.skipIf(Stepper is None, "needs RPi.GPIO")
+class TrackTest(unittest.TestCase):
+    def setUp(self):
+        self.motor = Stepper(Shifter(data=16, latch=20, clock=21), None, drive='full')
+
+    def tearDown(self):
+        self.motor.close()
+
+    def test_full_step_reaches_odd_setpoint(self):
+        # on the full-step table (odd phase), one half-step away: the last step must be a half-step
+        for offset in (1, -1, 3, -5):
+            self.motor.wait()
+            self.motor.restore(0, 1)
+            self.motor.track(offset / Stepper.steps_per_degree)
+            self.assertTrue(self.motor.wait(2), f"tracking {offset} half-steps never settled")
+            self.assertEqual(self.motor.motion.position, offset)
+            self.assertEqual(self.motor._armed.value, 0)
+            # and the worker is free for the next command
+            self.assertTrue(self.motor.goAngle(0).wait(5))
+
+if __name__ == '__main__':
+    unittest.main()